@@ -0,0 +1,12 @@
+from .leaderboard import compute_leaderboard, get_leaderboard
+from .statistics import compute_statistics, get_statistics
+from .importance import compute_importance, get_importance
+
+__all__ = [
+    "compute_leaderboard",
+    "get_leaderboard",
+    "compute_statistics",
+    "get_statistics",
+    "compute_importance",
+    "get_importance",
+]
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import numpy as np
+from scipy.stats import rankdata
+from django.conf import settings
+from django.core.cache import cache
+from bender.models import Parameter
+
+
+def get_numeric(values):
+    """Float array of values, NaN for values which are not numbers."""
+    return np.array([value if isinstance(value, (int, float)) and not isinstance(value, bool)
+                     else np.nan for value in values], dtype=float)
+
+
+def get_codes(values):
+    """Group index of each value, equal values (in json) being in the same group."""
+    return np.unique([json.dumps(value, sort_keys=True) for value in values],
+                     return_inverse=True)[1]
+
+
+def get_quantile_codes(values, bins):
+    """Group index of each value, groups being quantile bins."""
+    edges = np.unique(np.percentile(values, np.linspace(0, 100, bins + 1)[1:-1]))
+    return np.searchsorted(edges, values, side="right")
+
+
+def correlation_ratio(codes, values):
+    """Fraction of the variance of values explained by their group (eta squared).
+
+    It is the first order functional ANOVA term of a parameter when the other parameters are
+    drawn independently. With few observations per group it is biased upward.
+    """
+    total = ((values - values.mean()) ** 2).sum()
+    if total == 0:
+        return None
+    counts = np.bincount(codes)
+    means = np.bincount(codes, weights=values) / np.maximum(counts, 1)
+    return float((counts * (means - values.mean()) ** 2).sum() / total)
+
+
+def rank_correlation(x, y):
+    """Spearman correlation coefficient of x and y."""
+    rank_x, rank_y = rankdata(x), rankdata(y)
+    if rank_x.std() == 0 or rank_y.std() == 0:
+        return None
+    return float(np.corrcoef(rank_x, rank_y)[0, 1])
+
+
+def compute_importance(parameters, observations, metric, bins):
+    """Importance of each parameter of the search space for metric.
+
+    - importance: fraction of the variance of the metric explained by the parameter alone,
+      numeric parameters being grouped in quantile bins.
+    - correlation: Spearman correlation of a numeric parameter with the metric.
+
+    Observations without a numeric metric, or without a value for a parameter, are ignored.
+    """
+    finite = np.isfinite(observations.losses)
+    values = observations.losses[finite] * (1 if metric["type"] == "loss" else -1)
+    samples = [sample for sample, keep in zip(observations.samples, finite) if keep]
+
+    importances = []
+    for parameter in parameters:
+        name, category = parameter["name"], parameter["category"]
+        column = [sample.get(name) for sample in samples]
+        importance = correlation = None
+        if category == Parameter.CATEGORICAL:
+            present = np.array([value is not None for value in column], dtype=bool)
+            if present.sum() > 1:
+                codes = get_codes([value for value in column if value is not None])
+                importance = correlation_ratio(codes, values[present])
+        else:
+            column = get_numeric(column)
+            present = np.isfinite(column)
+            if present.sum() > 1:
+                importance = correlation_ratio(
+                    get_quantile_codes(column[present], bins), values[present])
+                correlation = rank_correlation(column[present], values[present])
+        importances.append({
+            "name": name,
+            "category": category,
+            "observations": int(present.sum()),
+            "importance": importance,
+            "correlation": correlation,
+        })
+    importances.sort(key=lambda x: -1 if x["importance"] is None else x["importance"],
+                     reverse=True)
+    return {
+        "metric": metric["metric_name"],
+        "type": metric["type"],
+        "observations": len(samples),
+        "parameters": importances,
+    }
+
+
+def get_importance(algo, metric):
+    """Cached compute_importance, recomputed when trials or search space of algo change.
+
+    Return None if the search space of algo is not defined.
+    """
+    parameters = algo.get_optimization_parameters()
+    if parameters is None:
+        return None
+    bins = settings.BENDER_IMPORTANCE_BINS
+    search_space = hashlib.md5(json.dumps(parameters, sort_keys=True).encode("utf-8"))
+    key = "bender:importance:{}:{}:{}:{}:{}".format(
+        algo.pk, metric["metric_name"], bins, algo.get_trials_revision(),
+        search_space.hexdigest())
+    importance = cache.get(key)
+    if importance is None:
+        importance = compute_importance(parameters, algo.get_observations(metric), metric, bins)
+        cache.set(key, importance, settings.BENDER_ANALYSIS_CACHE_TIMEOUT)
+    return importance
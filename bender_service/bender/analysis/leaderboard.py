@@ -0,0 +1,69 @@
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from bender.models import Algo, Trial, User
+from bender.models.algo import METRIC_VALUE_SQL
+
+LEADERBOARD_SQL = """
+SELECT id, algo_id, algo_name, username, parameters, results, comment, weight, created, value
+FROM (
+    SELECT t.id, t.algo_id, a.name AS algo_name, u.username, t.parameters, t.results,
+           t.comment, t.weight, t.created, t.value,
+           ROW_NUMBER() OVER (PARTITION BY t.algo_id ORDER BY t.value {order}, t.created) AS rank
+    FROM (
+        SELECT *, {value} AS value FROM {trial} WHERE experiment_id = %s
+    ) t
+    INNER JOIN {algo} a ON a.id = t.algo_id
+    INNER JOIN {user} u ON u.id = t.owner_id
+    WHERE t.value IS NOT NULL
+) ranked
+WHERE rank <= %s
+ORDER BY value {order}, created
+"""
+
+COLUMNS = ("id", "algo", "algo_name", "owner", "parameters", "results", "comment", "weight",
+           "created", "value")
+
+
+def compute_leaderboard(experiment, metric, k):
+    """Return the k best trials of each algo of experiment for metric, and the k best overall.
+
+    Trials are ranked by the numeric value of the metric in a window function, ascending for
+    a loss and descending for a reward. Trials without a numeric value are left out.
+    """
+    sql = LEADERBOARD_SQL.format(
+        order="ASC" if metric["type"] == "loss" else "DESC",
+        value=METRIC_VALUE_SQL,
+        trial=Trial._meta.db_table,
+        algo=Algo._meta.db_table,
+        user=User._meta.db_table,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, (metric["metric_name"], metric["metric_name"], experiment.pk, k))
+        trials = [dict(zip(COLUMNS, row)) for row in cursor.fetchall()]
+
+    # Trials are sorted best first, so are algos by order of first appearance
+    algos = OrderedDict()
+    for trial in trials:
+        algos.setdefault(trial["algo"], {"algo": trial["algo"], "algo_name": trial["algo_name"],
+                                         "trials": []})["trials"].append(trial)
+    return {
+        "metric": metric["metric_name"],
+        "type": metric["type"],
+        "k": k,
+        # The k best trials overall are among the k best of their algo
+        "overall": trials[:k],
+        "algos": list(algos.values()),
+    }
+
+
+def get_leaderboard(experiment, metric, k):
+    """Cached compute_leaderboard, recomputed when trials of experiment change."""
+    key = "bender:leaderboard:{}:{}:{}:{}".format(
+        experiment.pk, metric["metric_name"], k, experiment.get_trials_revision())
+    leaderboard = cache.get(key)
+    if leaderboard is None:
+        leaderboard = compute_leaderboard(experiment, metric, k)
+        cache.set(key, leaderboard, settings.BENDER_ANALYSIS_CACHE_TIMEOUT)
+    return leaderboard
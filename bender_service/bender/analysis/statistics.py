@@ -0,0 +1,86 @@
+from collections import OrderedDict
+import hashlib
+import json
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from bender.db.expressions import json_number
+from bender.models import Parameter
+
+QUANTILES = (5, 25, 50, 75, 95)
+
+
+def get_numeric_values(trials, columns):
+    """Return a (number of trials, number of columns) float array in one query.
+
+    columns is a list of (json column, key), values which are not numbers are NaN.
+    """
+    if not columns:
+        return np.empty((trials.count(), 0))
+    annotations = OrderedDict(("value_{}".format(i), json_number(column, key))
+                              for i, (column, key) in enumerate(columns))
+    rows = list(trials.order_by().annotate(**annotations).values_list(*annotations))
+    return np.array(rows, dtype=float).reshape(len(rows), len(columns))
+
+
+def describe(values, bins):
+    """Statistics of the finite values of a 1d array."""
+    finite = values[np.isfinite(values)]
+    statistics = OrderedDict([("count", int(finite.size)),
+                              ("missing", int(values.size - finite.size))])
+    if finite.size == 0:
+        return statistics
+    counts, edges = np.histogram(finite, bins=bins)
+    statistics.update([
+        ("mean", float(finite.mean())),
+        ("std", float(finite.std())),
+        ("min", float(finite.min())),
+        ("max", float(finite.max())),
+        ("quantiles", OrderedDict((str(q), float(value)) for q, value in
+                                  zip(QUANTILES, np.percentile(finite, QUANTILES)))),
+        ("histogram", {"counts": counts.tolist(), "edges": edges.tolist()}),
+    ])
+    return statistics
+
+
+def compute_statistics(trials, metrics, parameter_names, bins):
+    """Statistics of each metric and of each numeric parameter over trials."""
+    metric_names = [metric["metric_name"] for metric in metrics]
+    columns = ([("results", name) for name in metric_names] +
+               [("parameters", name) for name in parameter_names])
+    values = get_numeric_values(trials, columns)
+    statistics = OrderedDict([("trial_count", values.shape[0]),
+                              ("metrics", OrderedDict()),
+                              ("parameters", OrderedDict())])
+    for i, metric in enumerate(metrics):
+        statistics["metrics"][metric["metric_name"]] = describe(values[:, i], bins)
+        statistics["metrics"][metric["metric_name"]]["type"] = metric.get("type")
+    for i, name in enumerate(parameter_names, start=len(metrics)):
+        statistics["parameters"][name] = describe(values[:, i], bins)
+    return statistics
+
+
+def get_statistics(obj):
+    """Cached statistics of the trials of an algo or an experiment.
+
+    Categorical parameters are left out. Statistics are recomputed when trials, metrics
+    or numeric parameters change.
+    """
+    if obj._meta.model_name == "algo":
+        experiment, parameters = obj.experiment, obj.parameters.all()
+    else:
+        experiment, parameters = obj, Parameter.objects.filter(algo__experiment=obj)
+    parameter_names = sorted(set(parameters.exclude(category=Parameter.CATEGORICAL)
+                                           .values_list("name", flat=True)))
+    bins = settings.BENDER_STATISTICS_BINS
+    search_space = hashlib.md5(json.dumps([experiment.metrics, parameter_names],
+                                          sort_keys=True).encode("utf-8"))
+    key = "bender:statistics:{}:{}:{}:{}:{}".format(
+        obj._meta.model_name, obj.pk, bins, obj.get_trials_revision(),
+        search_space.hexdigest())
+    statistics = cache.get(key)
+    if statistics is None:
+        statistics = compute_statistics(obj.trials.all(), experiment.metrics,
+                                        parameter_names, bins)
+        cache.set(key, statistics, settings.BENDER_ANALYSIS_CACHE_TIMEOUT)
+    return statistics
@@ -0,0 +1,117 @@
+from collections import OrderedDict
+import hashlib
+import hmac
+import threading
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework import authentication, exceptions
+from rest_framework.authtoken.models import Token
+
+User = get_user_model()
+
+
+class ExpiringCache(object):
+    """Per process LRU cache whose entries expire ttl seconds after being set."""
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, time.monotonic() + ttl)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = ExpiringCache()
+credentials_cache = ExpiringCache()
+
+
+class CachedTokenAuthentication(authentication.TokenAuthentication):
+    """Token authentication ("Authorization: Token <key>") caching the user id of tokens.
+
+    Only the user id is cached, the user is loaded by primary key on each request so that
+    requests never share a user instance and deactivated users are rejected at once.
+    """
+
+    def authenticate_credentials(self, key):
+        user_pk = token_cache.get(key)
+        if user_pk is not None:
+            user = User.objects.filter(pk=user_pk, is_active=True).first()
+            if user is not None:
+                return user, Token(key=key, user=user)
+            token_cache.delete(key)
+
+        user, token = super(CachedTokenAuthentication, self).authenticate_credentials(key)
+        token_cache.set(key, user.pk, settings.BENDER_AUTHENTICATION_CACHE_TTL)
+        return user, token
+
+
+class CachedBasicAuthentication(authentication.BasicAuthentication):
+    """Basic authentication hashing passwords once per BENDER_AUTHENTICATION_CACHE_TTL.
+
+    Verified credentials are remembered by an HMAC of username and password, along with the
+    password hash of the user at the time. A request with the same credentials is then
+    authenticated by checking the user still has that password hash, without hashing the
+    password again. Changing the password therefore invalidates cached credentials at once.
+
+    Disabled (requests are left unauthenticated) when BENDER_BASIC_AUTHENTICATION is False.
+    """
+
+    def authenticate(self, request):
+        if not settings.BENDER_BASIC_AUTHENTICATION:
+            return None
+        return super(CachedBasicAuthentication, self).authenticate(request)
+
+    def authenticate_credentials(self, userid, password, *args):
+        key = hmac.new(settings.SECRET_KEY.encode("utf-8"),
+                       "{}:{}".format(userid, password).encode("utf-8"),
+                       hashlib.sha256).hexdigest()
+        cached = credentials_cache.get(key)
+        if cached is not None:
+            user_pk, password_hash = cached
+            user = User.objects.filter(pk=user_pk, password=password_hash, is_active=True).first()
+            if user is not None:
+                return user, None
+            credentials_cache.delete(key)
+
+        user, auth = super(CachedBasicAuthentication, self).authenticate_credentials(
+            userid, password, *args)
+        credentials_cache.set(key, (user.pk, user.password),
+                              settings.BENDER_AUTHENTICATION_CACHE_TTL)
+        return user, auth
+
+
+def rotate_token(user):
+    """Replace the API token of user and return the new one.
+
+    The old token is evicted from the cache of this process only: other processes keep
+    accepting it for up to BENDER_AUTHENTICATION_CACHE_TTL seconds.
+    """
+    for key in Token.objects.filter(user=user).values_list("key", flat=True):
+        token_cache.delete(key)
+    Token.objects.filter(user=user).delete()
+    return Token.objects.create(user=user)
@@ -0,0 +1,16 @@
+from .data import create_benchmark_algo, create_trials
+from .timing import measure, summarize
+from .api import measure_requests
+from .synthetic import get_parameters, get_metrics, copy_trials, METRIC_DISTRIBUTIONS
+
+__all__ = [
+    "create_benchmark_algo",
+    "create_trials",
+    "measure",
+    "summarize",
+    "measure_requests",
+    "get_parameters",
+    "get_metrics",
+    "copy_trials",
+    "METRIC_DISTRIBUTIONS",
+]
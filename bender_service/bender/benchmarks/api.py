@@ -0,0 +1,24 @@
+import time
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def measure_requests(client, method, path, data=None, repeat=10):
+    """Send repeat requests with an APIClient and return durations in seconds and query counts.
+
+    Raise RuntimeError if a response is not successful, a benchmark of errors being meaningless.
+    """
+    durations, queries = [], []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            if method == "get":
+                response = client.get(path, data)
+            else:
+                response = getattr(client, method)(path, data, format="json")
+            durations.append(time.perf_counter() - start)
+        if not 200 <= response.status_code < 300:
+            raise RuntimeError("{} {} answered {}: {}".format(
+                method.upper(), path, response.status_code, response.content[:200]))
+        queries.append(len(context.captured_queries))
+    return durations, queries
@@ -0,0 +1,54 @@
+import uuid
+import numpy as np
+from django.contrib.auth import get_user_model
+from bender.models import Experiment, Algo, Parameter, Trial
+
+User = get_user_model()
+
+BENCHMARK_METRICS = [{"metric_name": "loss", "type": "loss"},
+                     {"metric_name": "accuracy", "type": "reward"}]
+
+BENCHMARK_PARAMETERS = [
+    {"name": "learning_rate", "category": Parameter.UNIFORM,
+     "search_space": {"low": 1e-5, "high": 1e-1}},
+    {"name": "dropout", "category": Parameter.UNIFORM,
+     "search_space": {"low": 0, "high": 0.9}},
+    {"name": "activation", "category": Parameter.CATEGORICAL,
+     "search_space": {"values": ["relu", "tanh", "sigmoid"]}},
+]
+
+
+def create_benchmark_algo(owner=None):
+    """Create an algo with a defined search space in a new experiment (and user)."""
+    name = "benchmark {}".format(uuid.uuid4().hex)
+    if owner is None:
+        owner = User.objects.create_user(username=name[:30], password=uuid.uuid4().hex,
+                                         email="{}@example.com".format(name[-12:]))
+    experiment = Experiment.objects.create(name=name, owner=owner, metrics=BENCHMARK_METRICS)
+    algo = Algo.objects.create(name=name, owner=owner, experiment=experiment)
+    for parameter in BENCHMARK_PARAMETERS:
+        Parameter.objects.create(algo=algo, **parameter)
+    return algo
+
+
+def create_trials(algo, number, batch_size=5000, random_state=None):
+    """Bulk create number random trials of algo."""
+    random_state = random_state or np.random.RandomState(0)
+    activations = BENCHMARK_PARAMETERS[2]["search_space"]["values"]
+    created = 0
+    while created < number:
+        size = min(batch_size, number - created)
+        learning_rates = random_state.uniform(1e-5, 1e-1, size).tolist()
+        dropouts = random_state.uniform(0, 0.9, size).tolist()
+        choices = random_state.randint(len(activations), size=size).tolist()
+        losses = random_state.exponential(1, size).tolist()
+        Trial.objects.bulk_create([
+            Trial(algo=algo, experiment_id=algo.experiment_id, owner_id=algo.owner_id,
+                  parameters={"learning_rate": learning_rate, "dropout": dropout,
+                              "activation": activations[choice]},
+                  results={"loss": loss, "accuracy": 1. / (1. + loss)})
+            for learning_rate, dropout, choice, loss
+            in zip(learning_rates, dropouts, choices, losses)
+        ])
+        created += size
+    Trial.update_counters(algo.pk, algo.experiment_id, number)
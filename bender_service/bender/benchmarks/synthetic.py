@@ -0,0 +1,117 @@
+import datetime
+import io
+import json
+import uuid
+import numpy as np
+from django.utils import timezone
+from bender.models import Parameter, Trial
+
+CATEGORIES = [category for category, _ in Parameter.PARAMETER_TYPE]
+
+SEARCH_SPACES = {
+    Parameter.DESCRIPTIVE: None,
+    Parameter.CATEGORICAL: {"values": ["a", "b", "c", "d"]},
+    Parameter.UNIFORM: {"low": 0, "high": 1},
+    Parameter.NORMAL: {"mu": 0, "sigma": 1},
+    Parameter.LOGNORMAL: {"mu": 1, "sigma": 2, "low": 1e-3, "high": 1e3},
+    Parameter.LOGUNIFORM: {"low": 1e-5, "high": 1},
+}
+
+METRIC_DISTRIBUTIONS = ("exponential", "normal", "lognormal", "uniform")
+
+TRIAL_COLUMNS = ("id", "created", "modified", "algo_id", "experiment_id", "owner_id",
+                 "parameters", "results", "comment", "weight")
+
+
+def get_parameters(number):
+    """Name, category and search space of number parameters, cycling through categories."""
+    return [
+        {"name": "parameter_{}".format(i), "category": CATEGORIES[i % len(CATEGORIES)],
+         "search_space": SEARCH_SPACES[CATEGORIES[i % len(CATEGORIES)]]}
+        for i in range(number)
+    ]
+
+
+def get_metrics(number):
+    """Metrics of an experiment, alternating losses and rewards."""
+    return [{"metric_name": "metric_{}".format(i), "type": "loss" if i % 2 == 0 else "reward"}
+            for i in range(number)]
+
+
+def escape(text):
+    """Escape text for the COPY text format (json never contains tabs nor newlines)."""
+    return text.replace("\\", "\\\\")
+
+
+def sample_parameter(parameter, size, random_state):
+    """json encoded values of a parameter drawn from its search space."""
+    category, search_space = parameter["category"], parameter["search_space"]
+    if category == Parameter.DESCRIPTIVE:
+        return [str(value) for value in random_state.randint(1000, size=size).tolist()]
+    if category == Parameter.CATEGORICAL:
+        values = np.array([escape(json.dumps(value)) for value in search_space["values"]])
+        return values[random_state.randint(len(values), size=size)].tolist()
+    if category == Parameter.UNIFORM:
+        values = random_state.uniform(search_space["low"], search_space["high"], size)
+    elif category == Parameter.NORMAL:
+        values = random_state.normal(search_space["mu"], search_space["sigma"], size)
+    elif category == Parameter.LOGNORMAL:
+        values = np.clip(random_state.lognormal(np.log(search_space["mu"]),
+                                                np.log(search_space["sigma"]), size),
+                         search_space["low"], search_space["high"])
+    else:
+        values = np.exp(random_state.uniform(np.log(search_space["low"]),
+                                             np.log(search_space["high"]), size))
+    return [repr(value) for value in values.tolist()]
+
+
+def sample_metric(distribution, size, random_state):
+    """json encoded values of a metric."""
+    if distribution == "exponential":
+        values = random_state.exponential(1, size)
+    elif distribution == "normal":
+        values = random_state.normal(0, 1, size)
+    elif distribution == "lognormal":
+        values = random_state.lognormal(0, 1, size)
+    else:
+        values = random_state.uniform(0, 1, size)
+    return [repr(value) for value in values.tolist()]
+
+
+def get_json_template(keys):
+    """str.format template of a json object with keys, values being formatted json."""
+    items = ", ".join("{}: {{}}".format(escape(json.dumps(key)).replace("{", "{{")
+                                        .replace("}", "}}"))
+                      for key in keys)
+    return "{{" + items + "}}"
+
+
+def copy_trials(cursor, algo, parameters, metrics, number, distribution="exponential",
+                batch_size=100000, random_state=None):
+    """Insert number random trials of algo with COPY, batch_size rows at a time.
+
+    Trials are created one second apart, ending now. Counters are not updated.
+    psycopg2 does not support COPY when a wait callback is set (green psycopg).
+    """
+    random_state = random_state or np.random.RandomState(0)
+    parameters_template = get_json_template([parameter["name"] for parameter in parameters])
+    results_template = get_json_template([metric["metric_name"] for metric in metrics])
+    row_template = "\t".join(["{}"] * 3 + [str(algo.pk), str(algo.experiment_id),
+                                           str(algo.owner_id), "{}", "{}", "\\N", "1"]) + "\n"
+    sql = "COPY {} ({}) FROM STDIN".format(Trial._meta.db_table, ", ".join(TRIAL_COLUMNS))
+    start = timezone.now() - datetime.timedelta(seconds=number)
+    created = 0
+    while created < number:
+        size = min(batch_size, number - created)
+        samples = zip(*[sample_parameter(parameter, size, random_state)
+                        for parameter in parameters])
+        results = zip(*[sample_metric(distribution, size, random_state) for _ in metrics])
+        rows = io.StringIO()
+        for i, (sample, result) in enumerate(zip(samples, results), start=created):
+            timestamp = start + datetime.timedelta(seconds=i)
+            rows.write(row_template.format(uuid.uuid4(), timestamp, timestamp,
+                                           parameters_template.format(*sample),
+                                           results_template.format(*result)))
+        rows.seek(0)
+        cursor.copy_expert(sql, rows)
+        created += size
@@ -0,0 +1,21 @@
+import time
+import numpy as np
+
+
+def measure(func, repeat=10):
+    """Call func repeat times and return durations in seconds."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def summarize(durations):
+    """Return mean and percentiles of durations in milliseconds, and sequential throughput."""
+    durations = np.asarray(durations) * 1000
+    p50, p95, p99 = np.percentile(durations, [50, 95, 99]).tolist()
+    return {"n": len(durations), "mean": float(durations.mean()),
+            "p50": p50, "p95": p95, "p99": p99,
+            "throughput": float(1000 * len(durations) / durations.sum())}
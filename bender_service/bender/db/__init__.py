@@ -0,0 +1,22 @@
+from .cursors import iterate_queryset
+from .expressions import JSON_COLUMNS, JSON_NUMBER_SQL, json_number, json_text, json_ordering
+from .indexes import get_metric_names, get_metric_index_name, create_metric_indexes
+from .green import make_psycopg_green, make_psycopg_blocking, is_psycopg_green
+from .instrumentation import instrument_connection, get_query_stats
+
+__all__ = [
+    "iterate_queryset",
+    "JSON_COLUMNS",
+    "JSON_NUMBER_SQL",
+    "json_number",
+    "json_text",
+    "json_ordering",
+    "get_metric_names",
+    "get_metric_index_name",
+    "create_metric_indexes",
+    "make_psycopg_green",
+    "make_psycopg_blocking",
+    "is_psycopg_green",
+    "instrument_connection",
+    "get_query_stats",
+]
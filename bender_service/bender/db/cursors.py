@@ -0,0 +1,24 @@
+import uuid
+from django.db import connections
+
+
+def iterate_queryset(queryset, chunk_size=2000):
+    """Yield rows of a values_list queryset through a server side cursor.
+
+    Unlike QuerySet.iterator, which fetches the whole result set in the client before
+    returning the first row, rows are fetched from postgres chunk_size at a time so memory
+    stays flat whatever the size of the result.
+    """
+    connection = connections[queryset.db]
+    sql, params = queryset.query.sql_with_params()
+    connection.ensure_connection()
+    # Outside of a transaction postgres only accepts cursors declared WITH HOLD
+    cursor = connection.connection.cursor(name="bender_{}".format(uuid.uuid4().hex),
+                                          withhold=not connection.in_atomic_block)
+    cursor.itersize = chunk_size
+    try:
+        cursor.execute(sql, params)
+        for row in cursor:
+            yield row
+    finally:
+        cursor.close()
@@ -0,0 +1,33 @@
+from django.db.models import FloatField
+from django.db.models.expressions import OrderBy, RawSQL
+
+JSON_COLUMNS = ("results", "parameters")
+
+# Value of a json key if it is a number, NULL otherwise
+JSON_NUMBER_SQL = ("CASE WHEN jsonb_typeof({column}->%s) = 'number' "
+                   "THEN ({column}->>%s)::double precision END")
+
+
+def json_number(column, key):
+    """Numeric value of key in json column, NULL if it is not a number."""
+    return RawSQL(JSON_NUMBER_SQL.format(column=column), (key, key), output_field=FloatField())
+
+
+def json_text(column, key):
+    """Text value of key in json column."""
+    return RawSQL("{}->>%s".format(column), (key,))
+
+
+class NullsLastOrderBy(OrderBy):
+    """Order with NULLs last whatever the direction (OrderBy has no nulls_last in Django 1.10)."""
+    template = "%(expression)s %(ordering)s NULLS LAST"
+
+
+def json_ordering(column, key, descending=False):
+    """Order by key of json column: numbers by value, then other values as text.
+
+    Expressions and directions are the ones of metric indexes, which makes the ordering an
+    index scan.
+    """
+    return [NullsLastOrderBy(json_number(column, key), descending=descending),
+            OrderBy(json_text(column, key), descending=descending)]
@@ -0,0 +1,33 @@
+from psycopg2 import extensions, OperationalError
+
+
+def gevent_wait_callback(connection, timeout=None):
+    """Wait for a psycopg2 connection by yielding to the gevent hub instead of blocking."""
+    from gevent.socket import wait_read, wait_write
+    while True:
+        state = connection.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            wait_read(connection.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(connection.fileno(), timeout=timeout)
+        else:
+            raise OperationalError("Bad result from poll: {}".format(state))
+
+
+def make_psycopg_green():
+    """Make psycopg2 cooperative with gevent.
+
+    Queries then only block the greenlet running them, other requests of the gevent worker
+    keep being served while postgres answers. COPY is not supported by psycopg2 in this mode.
+    """
+    extensions.set_wait_callback(gevent_wait_callback)
+
+
+def make_psycopg_blocking():
+    extensions.set_wait_callback(None)
+
+
+def is_psycopg_green():
+    return extensions.get_wait_callback() is gevent_wait_callback
@@ -0,0 +1,68 @@
+import hashlib
+from django.db import connections, DEFAULT_DB_ALIAS
+from .expressions import JSON_NUMBER_SQL
+
+# Trials are ordered by a json key within an algo or an experiment
+METRIC_INDEX_SCOPES = ("algo_id", "experiment_id")
+
+
+def get_metric_names(metrics):
+    """Return metric names declared in Experiment.metrics."""
+    return sorted({metric["metric_name"] for metric in metrics or []
+                   if isinstance(metric, dict) and metric.get("metric_name")})
+
+
+def get_metric_index_name(scope, metric_name, descending=False):
+    """Deterministic name (postgres truncates identifiers to 63 characters)."""
+    digest = hashlib.md5("{}:{}:{}".format(
+        scope, metric_name, "desc" if descending else "asc").encode("utf-8")).hexdigest()
+    return "bender_trial_{}_metric_{}".format(scope.split("_")[0], digest[:12])
+
+
+def get_metric_index_statements(metric_names, concurrently=True):
+    """Yield (index name, sql, params) creating the expression indexes of each scope and metric.
+
+    Metrics are indexed by numeric value, then by text value so that non-numeric values keep
+    an order. Numbers come before other values whatever the direction, which a backward scan
+    cannot give, hence an ascending and a descending index.
+    """
+    from bender.models import Trial
+    table = Trial._meta.db_table
+    number = JSON_NUMBER_SQL.format(column="results")
+    for metric_name in metric_names:
+        for scope in METRIC_INDEX_SCOPES:
+            for descending in (False, True):
+                name = get_metric_index_name(scope, metric_name, descending)
+                sql = ("CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} "
+                       "({scope}, ({number}) {direction} NULLS LAST, "
+                       "(results->>%s) {direction})").format(
+                    concurrently="CONCURRENTLY " if concurrently else "", name=name,
+                    table=table, scope=scope, number=number,
+                    direction="DESC" if descending else "ASC")
+                yield name, sql, (metric_name,) * 3
+
+
+def get_invalid_indexes(cursor, names):
+    """Names of indexes left invalid by a failed CREATE INDEX CONCURRENTLY."""
+    cursor.execute("SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                   "WHERE NOT i.indisvalid AND c.relname = ANY(%s)", (list(names),))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def create_metric_indexes(metric_names, concurrently=True, using=DEFAULT_DB_ALIAS):
+    """Create missing metric indexes, rebuild invalid ones, and return their names.
+
+    CREATE INDEX CONCURRENTLY does not lock bender_trial against writes but cannot run in a
+    transaction block, and takes minutes on large tables: it is meant to be run out of band
+    (create_metric_indexes command), not while serving a request.
+    """
+    connection = connections[using]
+    statements = list(get_metric_index_statements(metric_names, concurrently))
+    with connection.cursor() as cursor:
+        # IF NOT EXISTS would skip an invalid index forever
+        for name in get_invalid_indexes(cursor, [name for name, _, _ in statements]):
+            cursor.execute("DROP INDEX {}IF EXISTS {}".format(
+                "CONCURRENTLY " if concurrently else "", name))
+        for name, sql, params in statements:
+            cursor.execute(sql, params)
+    return [name for name, _, _ in statements]
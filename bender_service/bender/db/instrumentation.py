@@ -0,0 +1,52 @@
+import time
+from django.db.backends.utils import CursorWrapper, CursorDebugWrapper
+
+
+class ObservedCursorMixin(object):
+    """Count and time statements, and report them to the observers of the connection."""
+
+    def execute(self, sql, params=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            record_query(self.db, sql, params, time.perf_counter() - start)
+
+    def executemany(self, sql, param_list):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, param_list)
+        finally:
+            record_query(self.db, sql, param_list, time.perf_counter() - start)
+
+
+class ObservedCursorWrapper(ObservedCursorMixin, CursorWrapper):
+    pass
+
+
+class ObservedCursorDebugWrapper(ObservedCursorMixin, CursorDebugWrapper):
+    pass
+
+
+def record_query(connection, sql, params, duration):
+    connection.bender_query_count += 1
+    connection.bender_query_time += duration
+    for observer in connection.bender_query_observers:
+        observer(sql, params, duration)
+
+
+def instrument_connection(connection):
+    """Make cursors of connection record their statements (once per connection)."""
+    if hasattr(connection, "bender_query_observers"):
+        return
+    connection.bender_query_count = 0
+    connection.bender_query_time = 0.
+    connection.bender_query_observers = []
+    connection.make_cursor = lambda cursor: ObservedCursorWrapper(cursor, connection)
+    connection.make_debug_cursor = lambda cursor: ObservedCursorDebugWrapper(cursor, connection)
+
+
+def get_query_stats(connection):
+    """Number and total duration in seconds of the statements run by connection so far."""
+    return (getattr(connection, "bender_query_count", 0),
+            getattr(connection, "bender_query_time", 0.))
@@ -0,0 +1,5 @@
+from .trial import TrialExporter
+
+__all__ = [
+    "TrialExporter",
+]
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+import csv
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from bender.db import iterate_queryset
+
+
+class Echo(object):
+    """File like object whose write returns the written value, to stream csv rows."""
+
+    def write(self, value):
+        return value
+
+
+class TrialExporter(object):
+    """Stream trials of a queryset as NDJSON or CSV.
+
+    Each trial is flattened to one row: parameters and results become columns named
+    "parameters.<name>" and "results.<name>", comment is kept as a JSON document.
+    """
+
+    FORMATS = {
+        "ndjson": "application/x-ndjson",
+        "csv": "text/csv",
+    }
+
+    FIELDS = (
+        ("id", "id"),
+        ("algo", "algo_id"),
+        ("algo_name", "algo__name"),
+        ("experiment", "experiment_id"),
+        ("owner", "owner__username"),
+        ("created", "created"),
+        ("weight", "weight"),
+    )
+
+    def __init__(self, queryset, parameter_names, metric_names, chunk_size=2000):
+        self.queryset = queryset
+        self.parameter_names = list(parameter_names)
+        self.metric_names = list(metric_names)
+        self.chunk_size = chunk_size
+
+    @property
+    def columns(self):
+        return ([name for name, _ in self.FIELDS] +
+                ["parameters.{}".format(name) for name in self.parameter_names] +
+                ["results.{}".format(name) for name in self.metric_names] +
+                ["comment"])
+
+    def rows(self):
+        queryset = self.queryset.values_list(
+            *([field for _, field in self.FIELDS] + ["parameters", "results", "comment"]))
+        for row in iterate_queryset(queryset, chunk_size=self.chunk_size):
+            parameters, results, comment = row[-3:]
+            yield (list(row[:-3]) +
+                   [parameters.get(name) for name in self.parameter_names] +
+                   [results.get(name) for name in self.metric_names] +
+                   [comment])
+
+    def ndjson(self):
+        columns = self.columns
+        for row in self.rows():
+            yield json.dumps(OrderedDict(zip(columns, row)), cls=DjangoJSONEncoder) + "\n"
+
+    def csv(self):
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.columns)
+        for row in self.rows():
+            row[-1] = json.dumps(row[-1]) if row[-1] is not None else None
+            yield writer.writerow(row)
+
+    def export(self, output):
+        return getattr(self, output)()
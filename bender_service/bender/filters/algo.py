@@ -1,4 +1,4 @@
-import django_filters
+import django_filters.rest_framework
 from ..models import Algo
 
 
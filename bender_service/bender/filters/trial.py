@@ -1,33 +1,52 @@
-from django.db.models.expressions import RawSQL
-import django_filters
-from ..models import Trial
+import math
+import re
+import django_filters.rest_framework
+from rest_framework.exceptions import ValidationError
+from bender.db.expressions import JSON_COLUMNS, json_number, json_ordering
+from bender.models import Trial
+
+# results__<key>__<lookup>=<number>, eg. results__accuracy__gte=0.9
+RANGE_FILTER_REGEX = re.compile(
+    r"^(?P<column>{})__(?P<key>.+)__(?P<lookup>gte|gt|lte|lt)$".format("|".join(JSON_COLUMNS)))
 
 
 class TrialFilter(django_filters.rest_framework.FilterSet):
     owner = django_filters.CharFilter(name="owner__username")
     o_results = django_filters.CharFilter(method='filter_json')
     o_parameters = django_filters.CharFilter(method='filter_json')
-    o = django_filters.OrderingFilter(
-        fields=(
-            ('created', 'date'),
-        ),
-    )
+    o = django_filters.OrderingFilter(fields=(('created', 'date'),))
 
     class Meta:
         model = Trial
         fields = ['experiment', 'algo']
 
-    def filter_json(self, queryset, name, value):
-
-        key = name.split("o_")[1]
-        reverse = False
-        if value[0] == "-":
-            reverse = True
-            value = value[1:]
-
-        queryset = queryset.order_by(RawSQL("{}->>%s".format(key), (value,)))
-
-        if reverse:
-            queryset = queryset.reverse()
+    @property
+    def qs(self):
+        if not hasattr(self, '_qs'):
+            self._qs = self.filter_ranges(super().qs)
+        return self._qs
 
+    def filter_json(self, queryset, name, value):
+        """Order by a json key, numbers by value then other values as text."""
+        column = name.split("o_")[1]
+        descending = value.startswith("-")
+        key = value[1:] if descending else value
+        return queryset.order_by(*json_ordering(column, key, descending))
+
+    def filter_ranges(self, queryset):
+        """Keep trials whose numeric value of a json key is in the range given by the query."""
+        for i, (param, value) in enumerate(sorted(self.data.items())):
+            match = RANGE_FILTER_REGEX.match(param)
+            if match is None:
+                continue
+            try:
+                value = float(value)
+            except ValueError:
+                value = math.nan
+            if not math.isfinite(value):
+                raise ValidationError({param: "A number is required."})
+            alias = "range_{}".format(i)
+            queryset = queryset.annotate(
+                **{alias: json_number(match.group("column"), match.group("key"))}
+            ).filter(**{"{}__{}".format(alias, match.group("lookup")): value})
         return queryset
@@ -0,0 +1,80 @@
+import json
+from collections import OrderedDict
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from bender.benchmarks import create_benchmark_algo, create_trials, measure_requests, summarize
+
+ENDPOINTS = ("suggest", "trial_create", "trial_list", "experiment_list", "algo_list")
+
+
+def get_requests(algo, optimizer):
+    """(method, path, data) of each benchmarked endpoint."""
+    return OrderedDict([
+        ("suggest", ("post", "/api/algos/{}/suggest/".format(algo.pk),
+                     {"metric": "loss", "optimizer": optimizer, "lease": 0})),
+        ("trial_create", ("post", "/api/trials/",
+                          {"algo": str(algo.pk),
+                           "parameters": {"learning_rate": 0.01, "dropout": 0.5,
+                                          "activation": "relu"},
+                           "results": {"loss": 0.5, "accuracy": 0.66}})),
+        ("trial_list", ("get", "/api/trials/",
+                        {"algo": str(algo.pk), "o_results": "-accuracy"})),
+        ("experiment_list", ("get", "/api/experiments/", {"owner": algo.owner.username})),
+        ("algo_list", ("get", "/api/algos/", {"experiment": str(algo.experiment_id)})),
+    ])
+
+
+class Command(BaseCommand):
+    help = ("Measure latency, throughput and query count of the API hot paths for an algo of "
+            "1k, 10k and 100k trials. Requests are sent in process through the whole middleware "
+            "stack, against the configured database. Benchmark data is rolled back unless --keep "
+            "is given.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=ENDPOINTS)
+        parser.add_argument("--optimizer", default="parzen_estimator",
+                            choices=("random", "parzen_estimator"))
+        parser.add_argument("--output", help="Also write results as json to this file.")
+        parser.add_argument("--keep", action="store_true", help="Keep benchmark data.")
+
+    def handle(self, *args, **options):
+        sizes = sorted(options["sizes"])
+        results = []
+        # Trials created by the benchmark must not be throttled
+        max_trials = sizes[-1] + options["repeat"] * len(sizes)
+        with override_settings(BENDER_MAX_TRIALS_PER_ALGO=max_trials), transaction.atomic():
+            algo = create_benchmark_algo()
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION="Token {}".format(Token.objects.create(user=algo.owner).key))
+            requests = get_requests(algo, options["optimizer"])
+            for size in sizes:
+                create_trials(algo, size - algo.trial_count)
+                algo.refresh_from_db()
+                self.stdout.write("{} trials".format(size))
+                for endpoint in options["endpoints"]:
+                    results.append(self.benchmark(client, size, endpoint, requests[endpoint],
+                                                  options["repeat"]))
+            transaction.set_rollback(not options["keep"])
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(results, f, indent=2)
+
+    def benchmark(self, client, size, endpoint, request, repeat):
+        method, path, data = request
+        try:
+            durations, queries = measure_requests(client, method, path, data, repeat)
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        result = dict(summarize(durations), endpoint=endpoint, trials=size,
+                      queries=max(queries))
+        self.stdout.write(
+            "  {endpoint:<16} p50 {p50:9.1f} ms  p95 {p95:9.1f} ms  p99 {p99:9.1f} ms  "
+            "{throughput:8.1f} req/s  {queries:3d} queries".format(**result))
+        return result
@@ -0,0 +1,49 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from bender.db import make_psycopg_green, make_psycopg_blocking, is_psycopg_green
+
+
+class Command(BaseCommand):
+    help = ("Measure query throughput of concurrent greenlets with blocking and with green "
+            "(gevent cooperative) psycopg2.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=20,
+                            help="Greenlets running queries, each on its own connection.")
+        parser.add_argument("--queries", type=int, default=10, help="Queries per greenlet.")
+        parser.add_argument("--sleep", type=float, default=0.05,
+                            help="Duration of each query (SELECT pg_sleep), in seconds.")
+
+    def handle(self, *args, **options):
+        was_green = is_psycopg_green()
+        try:
+            for name, setup in (("blocking", make_psycopg_blocking), ("green", make_psycopg_green)):
+                setup()
+                elapsed = self.run(options["concurrency"], options["queries"], options["sleep"])
+                total = options["concurrency"] * options["queries"]
+                self.stdout.write("{:<8} {} queries in {:.2f} s, {:.1f} queries/s".format(
+                    name, total, elapsed, total / elapsed))
+        finally:
+            (make_psycopg_green if was_green else make_psycopg_blocking)()
+
+    def run(self, concurrency, queries, sleep):
+        import gevent
+        # Connections are opened before the clock starts
+        connections = [connection.get_new_connection(connection.get_connection_params())
+                       for _ in range(concurrency)]
+
+        def client(db_connection):
+            with db_connection.cursor() as cursor:
+                for _ in range(queries):
+                    cursor.execute("SELECT pg_sleep(%s)", (sleep,))
+                    cursor.fetchall()
+
+        try:
+            start = time.perf_counter()
+            gevent.joinall([gevent.spawn(client, db_connection) for db_connection in connections],
+                           raise_error=True)
+            return time.perf_counter() - start
+        finally:
+            for db_connection in connections:
+                db_connection.close()
@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from bender.benchmarks import create_benchmark_algo, create_trials, measure, summarize
+from bender.optimization import OptimizationProblemCache, suggest
+
+METRIC = {"metric_name": "loss", "type": "loss"}
+
+
+def get_legacy_observations(algo, metric):
+    """Observations built from hydrated trials, as before values_list extraction."""
+    return [
+        {
+            "sample": trial.parameters,
+            "loss": (trial.results[metric["metric_name"]]
+                     if metric["type"] == "loss" else -trial.results[metric["metric_name"]]),
+            "weight": trial.weight
+        }
+        for trial in algo.trials.all()
+    ]
+
+
+class Command(BaseCommand):
+    help = ("Measure observation extraction and suggest latency for algos of 1k, 10k and 100k "
+            "trials. Benchmark data is rolled back unless --keep is given.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--optimizer", default="parzen_estimator",
+                            choices=("random", "parzen_estimator"))
+        parser.add_argument("--keep", action="store_true", help="Keep benchmark data.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            algo = create_benchmark_algo()
+            trial_count = 0
+            for size in sorted(options["sizes"]):
+                create_trials(algo, size - trial_count)
+                trial_count = size
+                self.benchmark(algo, size, options["repeat"], options["optimizer"])
+            transaction.set_rollback(not options["keep"])
+
+    def benchmark(self, algo, size, repeat, optimizer):
+        cache = OptimizationProblemCache(max_size=1)
+
+        def cold_suggest():
+            cache.clear()
+            suggest(cache.get(algo, METRIC), optimizer)
+
+        cache.get(algo, METRIC)
+        timings = [
+            ("legacy observations", lambda: get_legacy_observations(algo, METRIC)),
+            ("observations", lambda: algo.get_observations(METRIC)),
+            ("suggest (cold cache)", cold_suggest),
+            ("suggest (warm cache)", lambda: suggest(cache.get(algo, METRIC), optimizer)),
+        ]
+        self.stdout.write("{} trials".format(size))
+        for name, func in timings:
+            self.stdout.write(
+                "  {name:<24} mean {mean:9.1f} ms  p50 {p50:9.1f} ms  p95 {p95:9.1f} ms".format(
+                    name=name, **summarize(measure(func, repeat))))
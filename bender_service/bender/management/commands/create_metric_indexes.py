@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from bender.db import get_metric_names, create_metric_indexes
+from bender.models import Experiment
+
+
+class Command(BaseCommand):
+    help = ("Create expression indexes on bender_trial for the metrics declared by experiments, "
+            "so trials ordered by a metric are read from an index.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("experiments", nargs="*",
+                            help="Experiment ids (default: every experiment).")
+        parser.add_argument("--blocking", action="store_true",
+                            help="Use a plain CREATE INDEX, which locks bender_trial "
+                                 "against writes but can run inside a transaction.")
+
+    def handle(self, *args, **options):
+        experiments = Experiment.objects.all()
+        if options["experiments"]:
+            experiments = experiments.filter(pk__in=options["experiments"])
+        metric_names = set()
+        for metrics in experiments.values_list("metrics", flat=True):
+            metric_names.update(get_metric_names(metrics))
+        names = create_metric_indexes(sorted(metric_names),
+                                      concurrently=not options["blocking"])
+        self.stdout.write("{} indexes ensured for {} metrics.".format(
+            len(names), len(metric_names)))
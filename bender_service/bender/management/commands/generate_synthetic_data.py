@@ -0,0 +1,81 @@
+import time
+import uuid
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from bender.benchmarks import get_parameters, get_metrics, copy_trials, METRIC_DISTRIBUTIONS
+from bender.db import make_psycopg_green, make_psycopg_blocking, is_psycopg_green
+from bender.models import Experiment, Algo, Parameter, Trial
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ("Generate synthetic experiments, algos, parameters and trials. Trials are inserted "
+            "with COPY, parameters cycle through every parameter category.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--experiments", type=int, default=1)
+        parser.add_argument("--algos", type=int, default=10, help="Algos per experiment.")
+        parser.add_argument("--trials", type=int, default=1000, help="Trials per algo.")
+        parser.add_argument("--parameters", type=int, default=len(Parameter.PARAMETER_TYPE),
+                            help="Parameters per algo.")
+        parser.add_argument("--metrics", type=int, default=2, help="Metrics per experiment.")
+        parser.add_argument("--distribution", choices=METRIC_DISTRIBUTIONS,
+                            default="exponential", help="Distribution of metric values.")
+        parser.add_argument("--owner", help="Username of the owner, a new user by default.")
+        parser.add_argument("--batch-size", type=int, default=100000,
+                            help="Trials per COPY statement.")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options["owner"]:
+            try:
+                owner = User.objects.get(username=options["owner"])
+            except User.DoesNotExist:
+                raise CommandError("Unknown user {}".format(options["owner"]))
+        else:
+            username = "synthetic-{}".format(uuid.uuid4().hex[:8])
+            owner = User.objects.create_user(username=username, password=uuid.uuid4().hex,
+                                             email="{}@example.com".format(username))
+
+        # COPY is not supported by green psycopg
+        green = is_psycopg_green()
+        make_psycopg_blocking()
+        try:
+            random_state = np.random.RandomState(options["seed"])
+            for _ in range(options["experiments"]):
+                start = time.perf_counter()
+                experiment = self.generate_experiment(owner, options, random_state)
+                self.stdout.write("{} ({} algos, {} trials) in {:.1f}s".format(
+                    experiment.name, experiment.algo_count, experiment.trial_count,
+                    time.perf_counter() - start))
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE {}".format(Trial._meta.db_table))
+        finally:
+            if green:
+                make_psycopg_green()
+
+    @transaction.atomic()
+    def generate_experiment(self, owner, options, random_state):
+        metrics = get_metrics(options["metrics"])
+        parameters = get_parameters(options["parameters"])
+        experiment = Experiment.objects.create(
+            name="synthetic {}".format(uuid.uuid4().hex[:8]), owner=owner, metrics=metrics,
+            algo_count=options["algos"], trial_count=options["algos"] * options["trials"])
+        # Saving algos one by one would update counters through signals
+        algos = Algo.objects.bulk_create([
+            Algo(id=str(uuid.uuid4()), name="synthetic algo {}".format(i), owner=owner,
+                 experiment=experiment, trial_count=options["trials"])
+            for i in range(options["algos"])
+        ])
+        Parameter.objects.bulk_create([
+            Parameter(algo=algo, **parameter) for algo in algos for parameter in parameters
+        ])
+        with connection.cursor() as cursor:
+            for algo in algos:
+                copy_trials(cursor, algo, parameters, metrics, options["trials"],
+                            distribution=options["distribution"],
+                            batch_size=options["batch_size"], random_state=random_state)
+        return experiment
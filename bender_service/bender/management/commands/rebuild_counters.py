@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from bender.models import Algo, Experiment, Trial
+
+
+class Command(BaseCommand):
+    help = "Recompute trial and algo counters of algos and experiments from their rows."
+
+    @transaction.atomic()
+    def handle(self, *args, **options):
+        algo_table = Algo._meta.db_table
+        experiment_table = Experiment._meta.db_table
+        trial_table = Trial._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE {algo} SET trial_count = "
+                "(SELECT COUNT(*) FROM {trial} WHERE {trial}.algo_id = {algo}.id)".format(
+                    algo=algo_table, trial=trial_table))
+            algos = cursor.rowcount
+            cursor.execute(
+                "UPDATE {experiment} SET "
+                "trial_count = (SELECT COUNT(*) FROM {trial} "
+                "WHERE {trial}.experiment_id = {experiment}.id), "
+                "algo_count = (SELECT COUNT(*) FROM {algo} "
+                "WHERE {algo}.experiment_id = {experiment}.id)".format(
+                    experiment=experiment_table, algo=algo_table, trial=trial_table))
+            experiments = cursor.rowcount
+        self.stdout.write("Counters rebuilt for {} algos and {} experiments.".format(
+            algos, experiments))
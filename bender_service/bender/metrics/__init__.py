@@ -0,0 +1,20 @@
+from .registry import MetricsRegistry, registry, clear_metrics_dir
+from .exposition import render, CONTENT_TYPE
+from .middleware import MetricsMiddleware, ServerTimingMiddleware
+from .timing import phase, get_timings
+from .profiling import profile_request, save_profile, get_profile
+
+__all__ = [
+    "MetricsRegistry",
+    "registry",
+    "clear_metrics_dir",
+    "render",
+    "CONTENT_TYPE",
+    "MetricsMiddleware",
+    "ServerTimingMiddleware",
+    "phase",
+    "get_timings",
+    "profile_request",
+    "save_profile",
+    "get_profile",
+]
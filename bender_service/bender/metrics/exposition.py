@@ -0,0 +1,39 @@
+from collections import defaultdict
+from .registry import METRICS
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join('{}="{}"'.format(
+        name, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in labels) + "}"
+
+
+def format_value(value):
+    return repr(float(value))
+
+
+def render(counters, histograms):
+    """Prometheus text exposition of merged counters and histograms."""
+    samples = defaultdict(list)
+    for (name, labels), value in sorted(counters.items()):
+        samples[name].append("{}{} {}".format(name, format_labels(labels), format_value(value)))
+    for (name, labels), values in sorted(histograms.items()):
+        buckets = METRICS[name][2]
+        for bound, count in zip(buckets + ("+Inf",), values):
+            samples[name].append("{}_bucket{} {}".format(
+                name, format_labels(labels + (("le", str(bound)),)), format_value(count)))
+        samples[name].append("{}_sum{} {}".format(name, format_labels(labels),
+                                                  format_value(values[-1])))
+        samples[name].append("{}_count{} {}".format(name, format_labels(labels),
+                                                    format_value(values[-2])))
+
+    lines = []
+    for name, (kind, description, _) in METRICS.items():
+        lines.append("# HELP {} {}".format(name, description))
+        lines.append("# TYPE {} {}".format(name, kind))
+        lines.extend(samples[name])
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,85 @@
+import time
+from django.conf import settings
+from django.db import connection
+from bender.db import get_query_stats
+from .registry import registry
+from .timing import start_timings, stop_timings
+
+
+def get_view_labels(request, view_func):
+    """View class (or function) name and viewset action handling the request."""
+    view = getattr(view_func, "cls", view_func).__name__
+    actions = getattr(view_func, "actions", None) or {}
+    return {"view": view, "action": actions.get(request.method.lower(), request.method.lower())}
+
+
+def count_rows(data):
+    """Number of objects in the data of a response, paginated or not."""
+    if isinstance(data, dict) and isinstance(data.get("results"), list):
+        return len(data["results"])
+    if isinstance(data, list):
+        return len(data)
+    return 1 if data else 0
+
+
+class MetricsMiddleware(object):
+    """Record latency, statements and serialized objects of requests by view and action.
+
+    Requests which are not routed to a view are not recorded, to bound the number of labels.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.BENDER_METRICS:
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        queries, query_time = get_query_stats(connection)
+        response = self.get_response(request)
+        labels = getattr(request, "_bender_metrics_labels", None)
+        if labels is None:
+            return response
+
+        end_queries, end_query_time = get_query_stats(connection)
+        registry.observe("bender_request_duration_seconds", time.perf_counter() - start,
+                         status=str(response.status_code), **labels)
+        registry.inc("bender_request_queries_total", end_queries - queries, **labels)
+        registry.inc("bender_request_query_seconds_total", end_query_time - query_time, **labels)
+        if hasattr(response, "data"):
+            registry.inc("bender_request_rows_total", count_rows(response.data), **labels)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._bender_metrics_labels = get_view_labels(request, view_func)
+
+
+class ServerTimingMiddleware(object):
+    """Add a Server-Timing header to API responses, breaking their duration down by phase.
+
+    Phases are timed by ServerTimingMixin (authentication, permissions, throttles, rendering)
+    and by the code they concern (e.g. optimizer in suggest), database time is measured
+    here. The header is sent to superusers, or to everyone with BENDER_SERVER_TIMING.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.path.startswith("/api/"):
+            return self.get_response(request)
+
+        queries, query_time = get_query_stats(connection)
+        start_timings()
+        try:
+            response = self.get_response(request)
+        finally:
+            timings = stop_timings()
+        end_queries, end_query_time = get_query_stats(connection)
+        user = getattr(request, "user", None)
+        if settings.BENDER_SERVER_TIMING or (user is not None and user.is_superuser):
+            timings.add("db", end_query_time - query_time,
+                        "{} queries".format(end_queries - queries))
+            response["Server-Timing"] = timings.get_header()
+        return response
@@ -0,0 +1,267 @@
+import cProfile
+import glob
+import json
+import os
+import pstats
+import re
+import signal
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import Counter, OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, DEFAULT_DB_ALIAS
+from bender.db import instrument_connection
+
+# Frames of the project, other than the instrumentation itself, are kept in query stacks
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+IGNORED_DIRS = (os.path.dirname(os.path.abspath(__file__)),
+                os.path.join(PROJECT_DIR, "bender", "db"))
+
+SHAPE_SUBSTITUTIONS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"%s"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(...)"),
+    (re.compile(r"\s+"), " "),
+]
+
+MAX_STATEMENTS = 500
+MAX_ENTRIES = 50
+
+# Subdirectory of BENDER_METRICS_DIR where reports are shared by processes
+PROFILES_DIR = "profiles"
+
+# setitimer is process wide, a single request is sampled at a time
+sampling_lock = threading.Lock()
+
+
+def get_query_shape(sql):
+    """Statement with literals and parameters replaced by ?, to group statements by shape."""
+    for pattern, replacement in SHAPE_SUBSTITUTIONS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def get_project_stack():
+    """Frames of the project code leading to the current call, outermost first."""
+    return [
+        "{}:{} {}".format(os.path.relpath(frame.filename, PROJECT_DIR), frame.lineno, frame.name)
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(PROJECT_DIR) and
+        not frame.filename.startswith(IGNORED_DIRS) and "site-packages" not in frame.filename
+    ]
+
+
+def format_frame(frame):
+    code = frame.f_code
+    return "{}:{}({})".format(os.path.basename(code.co_filename), frame.f_lineno, code.co_name)
+
+
+class QueryRecorder(object):
+    """Record the statements of the current connection with the stack they were run from."""
+
+    def __init__(self):
+        self.connection = connections[DEFAULT_DB_ALIAS]
+        self.statements = []
+
+    def __call__(self, sql, params, duration):
+        self.statements.append({"sql": sql, "duration": duration, "stack": get_project_stack()})
+
+    def start(self):
+        instrument_connection(self.connection)
+        self.connection.bender_query_observers.append(self)
+
+    def stop(self):
+        self.connection.bender_query_observers.remove(self)
+
+    def get_report(self):
+        """Statements, and shapes of statements run BENDER_PROFILE_REPEATED_QUERIES times or
+        more, which usually are queries run once per object (N+1)."""
+        shapes = OrderedDict()
+        for statement in self.statements:
+            shape = shapes.setdefault(get_query_shape(statement["sql"]), {
+                "shape": get_query_shape(statement["sql"]), "count": 0, "duration": 0.,
+                "stack": statement["stack"]})
+            shape["count"] += 1
+            shape["duration"] += statement["duration"]
+        repeated = [shape for shape in shapes.values()
+                    if shape["count"] >= settings.BENDER_PROFILE_REPEATED_QUERIES]
+        return {
+            "count": len(self.statements),
+            "duration": sum(statement["duration"] for statement in self.statements),
+            "statements": self.statements[:MAX_STATEMENTS],
+            "repeated": sorted(repeated, key=lambda shape: -shape["count"]),
+        }
+
+
+class SamplingProfiler(object):
+    """Sample the stack of the main thread every BENDER_PROFILE_INTERVAL seconds of CPU time.
+
+    Samples are taken by a SIGPROF handler, so time waiting for the database is not sampled
+    (statements are recorded separately). In gevent workers, greenlets serving other requests
+    while this one waits may be sampled too.
+    """
+    name = "sampling"
+
+    def __init__(self):
+        self.stacks = Counter()
+
+    def handle(self, signum, frame):
+        stack = []
+        while frame is not None:
+            stack.append(format_frame(frame))
+            frame = frame.f_back
+        self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        """Raise ValueError out of the main thread, where signal handlers cannot be set."""
+        self.previous_handler = signal.signal(signal.SIGPROF, self.handle)
+        interval = settings.BENDER_PROFILE_INTERVAL
+        signal.setitimer(signal.ITIMER_PROF, interval, interval)
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self.previous_handler)
+
+    def get_report(self):
+        functions = Counter()
+        for stack, count in self.stacks.items():
+            functions[stack.rsplit(";", 1)[-1]] += count
+        return {
+            "samples": sum(self.stacks.values()),
+            "interval": settings.BENDER_PROFILE_INTERVAL,
+            # Folded stacks, as flame graph tools read them
+            "stacks": [{"stack": stack, "count": count}
+                       for stack, count in self.stacks.most_common(MAX_ENTRIES)],
+            "functions": [{"function": function, "samples": count}
+                          for function, count in functions.most_common(MAX_ENTRIES)],
+        }
+
+
+class DeterministicProfiler(object):
+    """cProfile, when the sampling profiler cannot be used."""
+    name = "cprofile"
+
+    def start(self):
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def get_report(self):
+        stats = pstats.Stats(self.profile).stats
+        functions = sorted(stats.items(), key=lambda item: -item[1][3])[:MAX_ENTRIES]
+        return {
+            "functions": [
+                {"function": "{}:{}({})".format(os.path.basename(filename), lineno, name),
+                 "calls": calls, "time": total_time, "cumulative": cumulative_time}
+                for (filename, lineno, name), (_, calls, total_time, cumulative_time, _)
+                in functions
+            ],
+        }
+
+
+def get_profiler():
+    """Started sampling profiler, or deterministic one if a request is already sampled or
+    signals cannot be used (platform without setitimer, thread other than the main one)."""
+    if hasattr(signal, "setitimer") and sampling_lock.acquire(blocking=False):
+        profiler = SamplingProfiler()
+        try:
+            profiler.start()
+            return profiler
+        except ValueError:
+            sampling_lock.release()
+    profiler = DeterministicProfiler()
+    profiler.start()
+    return profiler
+
+
+class RequestProfiler(object):
+    """Profile the handling of a request and record its statements, until stopped."""
+
+    def __init__(self, request):
+        self.request = request
+        self.recorder = QueryRecorder()
+        self.recorder.start()
+        self.profiler = get_profiler()
+        self.start = time.perf_counter()
+
+    def stop(self):
+        self.duration = time.perf_counter() - self.start
+        self.profiler.stop()
+        self.recorder.stop()
+        if isinstance(self.profiler, SamplingProfiler):
+            sampling_lock.release()
+
+    def get_report(self, response):
+        return {
+            "id": uuid.uuid4().hex,
+            "method": self.request.method,
+            "path": self.request.get_full_path(),
+            "status": response.status_code,
+            "duration": self.duration,
+            "python": sys.version.split()[0],
+            "profiler": self.profiler.name,
+            "profile": self.profiler.get_report(),
+            "queries": self.recorder.get_report(),
+        }
+
+
+def profile_request(request):
+    """Start profiling request, return the RequestProfiler to stop once it is handled."""
+    return RequestProfiler(request)
+
+
+def get_profile_key(profile_id):
+    return "bender:profile:{}".format(profile_id)
+
+
+def get_profile_path(profile_id):
+    return os.path.join(settings.BENDER_METRICS_DIR, PROFILES_DIR, "{}.json".format(profile_id))
+
+
+def save_profile(report):
+    """Keep report for BENDER_PROFILE_TIMEOUT seconds.
+
+    Reports are written in BENDER_METRICS_DIR, where every process can read them, or kept in
+    the cache of this process if it is not set.
+    """
+    if settings.BENDER_METRICS_DIR is None:
+        cache.set(get_profile_key(report["id"]), report, settings.BENDER_PROFILE_TIMEOUT)
+        return
+    path = get_profile_path(report["id"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    remove_expired_profiles()
+    with open(path + ".tmp", "w") as f:
+        json.dump(report, f)
+    os.replace(path + ".tmp", path)
+
+
+def remove_expired_profiles():
+    expired = time.time() - settings.BENDER_PROFILE_TIMEOUT
+    for path in glob.glob(get_profile_path("*")):
+        try:
+            if os.path.getmtime(path) < expired:
+                os.remove(path)
+        except OSError:
+            # Removed by another process
+            pass
+
+
+def get_profile(profile_id):
+    """Report saved by save_profile, None if there is none or it expired."""
+    if settings.BENDER_METRICS_DIR is None:
+        return cache.get(get_profile_key(profile_id))
+    path = get_profile_path(profile_id)
+    try:
+        if os.path.getmtime(path) < time.time() - settings.BENDER_PROFILE_TIMEOUT:
+            return None
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,145 @@
+import glob
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from django.conf import settings
+
+COUNTER = "counter"
+HISTOGRAM = "histogram"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# name: (type, help, histogram buckets)
+METRICS = OrderedDict([
+    ("bender_request_duration_seconds",
+     (HISTOGRAM, "Duration of requests by view and action.", LATENCY_BUCKETS)),
+    ("bender_request_queries_total",
+     (COUNTER, "Database statements run by requests by view and action.", None)),
+    ("bender_request_query_seconds_total",
+     (COUNTER, "Time spent in database statements by view and action.", None)),
+    ("bender_request_rows_total",
+     (COUNTER, "Objects serialized in responses by view and action.", None)),
+    ("bender_optimizer_duration_seconds",
+     (HISTOGRAM, "Time fitting optimizers and drawing samples.", LATENCY_BUCKETS)),
+])
+
+FILE_PREFIX = "bender_metrics_"
+
+
+class MetricsRegistry(object):
+    """Counters and histograms of a process, with labels.
+
+    With BENDER_METRICS_DIR set, each process (gunicorn workers, suggestion pool processes)
+    writes its metrics to its own file at most every BENDER_METRICS_FLUSH_INTERVAL seconds,
+    and the files of every process are merged when metrics are scraped.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        # Metrics of the parent are in its own file, forked processes start empty
+        self.pid = os.getpid()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self.last_flush = 0
+
+    def check_pid(self):
+        if os.getpid() != self.pid:
+            self.reset()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.check_pid()
+            self.counters[key] += value
+        self.flush()
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        buckets = METRICS[name][2]
+        with self.lock:
+            self.check_pid()
+            histogram = self.histograms.setdefault(key, [0] * (len(buckets) + 2))
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram[i] += 1
+            # Count of +Inf bucket, then sum
+            histogram[-2] += 1
+            histogram[-1] += value
+        self.flush()
+
+    @contextmanager
+    def time(self, name, **labels):
+        """Observe the duration of the block in histogram name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def dump(self):
+        with self.lock:
+            self.check_pid()
+            return {
+                "counters": [[name, labels, value]
+                             for (name, labels), value in self.counters.items()],
+                "histograms": [[name, labels, list(values)]
+                               for (name, labels), values in self.histograms.items()],
+            }
+
+    def flush(self, force=False):
+        """Write metrics of the process to its file in BENDER_METRICS_DIR."""
+        directory = settings.BENDER_METRICS_DIR
+        if directory is None:
+            return
+        if not force and time.time() - self.last_flush < settings.BENDER_METRICS_FLUSH_INTERVAL:
+            return
+        self.last_flush = time.time()
+        path = os.path.join(directory, "{}{}.json".format(FILE_PREFIX, os.getpid()))
+        os.makedirs(directory, exist_ok=True)
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.dump(), f)
+        os.replace(path + ".tmp", path)
+
+    def collect(self):
+        """Metrics of every process, or of this one if BENDER_METRICS_DIR is not set."""
+        if settings.BENDER_METRICS_DIR is None:
+            return merge([self.dump()])
+        self.flush(force=True)
+        dumps = []
+        for path in glob.glob(os.path.join(settings.BENDER_METRICS_DIR, FILE_PREFIX + "*.json")):
+            try:
+                with open(path) as f:
+                    dumps.append(json.load(f))
+            except (IOError, ValueError):  # Removed or being written
+                continue
+        return merge(dumps)
+
+
+def merge(dumps):
+    """Sum counters and histograms of several processes, keyed by (name, labels)."""
+    counters, histograms = defaultdict(float), {}
+    for dump in dumps:
+        for name, labels, value in dump["counters"]:
+            counters[(name, tuple(map(tuple, labels)))] += value
+        for name, labels, values in dump["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            if key in histograms:
+                histograms[key] = [a + b for a, b in zip(histograms[key], values)]
+            else:
+                histograms[key] = list(values)
+    return counters, histograms
+
+
+def clear_metrics_dir(directory):
+    """Remove the files of previous processes, called when the server starts."""
+    for path in glob.glob(os.path.join(directory, FILE_PREFIX + "*")):
+        os.remove(path)
+
+
+registry = MetricsRegistry()
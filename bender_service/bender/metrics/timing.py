@@ -0,0 +1,61 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Timings of the request being handled by the current thread (greenlet in gevent workers)
+_local = threading.local()
+
+
+class Timings(object):
+    """Durations in seconds of the phases of a request, summed by phase name."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = OrderedDict()
+        self.descriptions = {}
+
+    def add(self, name, duration, description=None):
+        self.phases[name] = self.phases.get(name, 0.) + duration
+        if description is not None:
+            self.descriptions[name] = description
+
+    def get_header(self):
+        """Server-Timing header value, durations in milliseconds, ending with the total."""
+        entries = []
+        phases = list(self.phases.items()) + [("total", time.perf_counter() - self.start)]
+        for name, duration in phases:
+            entry = "{};dur={:.1f}".format(name, duration * 1000)
+            if name in self.descriptions:
+                entry += ';desc="{}"'.format(self.descriptions[name].replace('"', "'"))
+            entries.append(entry)
+        return ", ".join(entries)
+
+
+def get_timings():
+    """Timings of the current request, None if it is not timed."""
+    return getattr(_local, "timings", None)
+
+
+def start_timings():
+    _local.timings = Timings()
+    return _local.timings
+
+
+def stop_timings():
+    timings, _local.timings = getattr(_local, "timings", None), None
+    return timings
+
+
+@contextmanager
+def phase(name):
+    """Add the duration of the block to phase name of the current request, if timed."""
+    timings = get_timings()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
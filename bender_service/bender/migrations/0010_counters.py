@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bender', '0009_pendingtrial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='algo',
+            name='trial_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='experiment',
+            name='algo_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='experiment',
+            name='trial_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunSQL(
+            sql=[
+                "UPDATE bender_algo SET trial_count = "
+                "(SELECT COUNT(*) FROM bender_trial WHERE bender_trial.algo_id = bender_algo.id)",
+                "UPDATE bender_experiment SET "
+                "trial_count = (SELECT COUNT(*) FROM bender_trial "
+                "WHERE bender_trial.experiment_id = bender_experiment.id), "
+                "algo_count = (SELECT COUNT(*) FROM bender_algo "
+                "WHERE bender_algo.experiment_id = bender_experiment.id)",
+            ],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bender', '0010_counters'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='trial',
+            index_together=set([('experiment', 'created'), ('algo', 'created')]),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+import django_extensions.db.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bender', '0011_trial_index_together'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrecomputedSuggestion',
+            fields=[
+                ('created', django_extensions.db.fields.CreationDateTimeField(auto_now_add=True, verbose_name='created')),
+                ('modified', django_extensions.db.fields.ModificationDateTimeField(auto_now=True, verbose_name='modified')),
+                ('id', django_extensions.db.fields.UUIDField(blank=True, editable=False, primary_key=True, serialize=False)),
+                ('metric', models.CharField(max_length=50)),
+                ('optimizer', models.CharField(max_length=50)),
+                ('minimum_observations', models.IntegerField()),
+                ('sample', django.contrib.postgres.fields.jsonb.JSONField()),
+                ('algo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='precomputed_suggestions', to='bender.Algo')),
+            ],
+            options={
+                'ordering': ('created',),
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='precomputedsuggestion',
+            index_together=set([('algo', 'metric', 'optimizer', 'minimum_observations')]),
+        ),
+    ]
@@ -3,6 +3,8 @@ from .algo import Algo
 from .trial import Trial
 from .user import User
 from .parameter import Parameter
+from .pending_trial import PendingTrial
+from .precomputed_suggestion import PrecomputedSuggestion
 
 
 __all__ = [
@@ -11,4 +13,6 @@ __all__ = [
     "Trial",
     "User",
     "Parameter",
+    "PendingTrial",
+    "PrecomputedSuggestion",
 ]
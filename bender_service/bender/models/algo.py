@@ -1,18 +1,31 @@
 from __future__ import unicode_literals
+from collections import namedtuple
+from itertools import compress
+import numpy as np
 from django_extensions.db.models import TimeStampedModel
 from django_extensions.db.fields import UUIDField
 from django.contrib.postgres.fields import JSONField
 from django.db import models
+from django.db.models.expressions import RawSQL
 from django.conf import settings
+from bender.db.expressions import JSON_NUMBER_SQL
 from .experiment import Experiment
+from .mixins import TrialsRevisionMixin
 
+# Value of a metric if it is a number, NULL otherwise
+METRIC_VALUE_SQL = JSON_NUMBER_SQL.format(column="results")
 
-class Algo(TimeStampedModel, models.Model):
+# Observations of an algo for a metric, in arrays rather than one dict per trial
+Observations = namedtuple("Observations", ("samples", "losses", "weights", "created"))
+
+
+class Algo(TrialsRevisionMixin, TimeStampedModel, models.Model):
     id = UUIDField(primary_key=True)
     name = models.CharField(max_length=100)
     experiment = models.ForeignKey(Experiment, related_name="algos")
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, related_name="algos")
     description = JSONField(null=True, blank=True)
+    trial_count = models.IntegerField(default=0)
 
     class Meta:
         unique_together = ('experiment', 'name',)
@@ -22,35 +35,71 @@ class Algo(TimeStampedModel, models.Model):
         return self.name
 
     def is_search_space_defined(self):
+        """Filtered in python so that prefetched parameters are used."""
         from bender.models import Parameter
         search_space_defined = True
-        for parameter in self.parameters.exclude(category=Parameter.DESCRIPTIVE):
+        for parameter in self.parameters.all():
+            if parameter.category == Parameter.DESCRIPTIVE:
+                continue
             if not parameter.category or not parameter.search_space:
                 search_space_defined = False
                 break
         return search_space_defined
 
-    def get_optimization_problem(self, metric):
+    def get_optimization_parameters(self):
+        """Return non descriptive parameters as benderopt expects them.
+
+        Return None if the search space is not defined for every parameter.
+        """
         from bender.models import Parameter
+        parameters = [parameter for parameter in self.parameters.all()
+                      if parameter.category != Parameter.DESCRIPTIVE]
+        for parameter in parameters:
+            if not parameter.category or not parameter.search_space:
+                return None
+        return [
+            {
+                "name": parameter.name,
+                "category": parameter.category,
+                "search_space": parameter.search_space
+            }
+            for parameter in parameters
+        ]
+
+    def get_observations(self, metric, trials=None):
+        """Return observations of trials (all algo trials by default) for metric.
+
+        Only the parameters, the weight and the metric are fetched, the metric being extracted
+        by postgres. Losses are nan for trials without a numeric value for metric.
+        """
+        if trials is None:
+            trials = self.trials.all()
+        rows = list(trials.annotate(
+            metric_value=RawSQL(METRIC_VALUE_SQL, (metric["metric_name"],) * 2)
+        ).values_list("parameters", "metric_value", "weight", "created"))
+        if not rows:
+            return Observations([], np.empty(0), np.empty(0), [])
+
+        samples, values, weights, created = zip(*rows)
+        losses = np.array(values, dtype=float)
+        if metric["type"] != "loss":
+            losses = -losses
+        return Observations(list(samples), losses, np.array(weights, dtype=float), list(created))
+
+    def get_optimization_problem(self, metric):
         data = None
-        if self.is_search_space_defined():
+        parameters = self.get_optimization_parameters()
+        if parameters is not None:
+            observations = self.get_observations(metric)
+            finite = np.isfinite(observations.losses)
             data = {
-                "parameters": [
-                    {
-                        "name": parameter.name,
-                        "category": parameter.category,
-                        "search_space": parameter.search_space
-                    }
-                    for parameter in self.parameters.all() if parameter.category != Parameter.DESCRIPTIVE
-                ],
+                "parameters": parameters,
                 "observations": [
-                    {
-                        "sample": trial.parameters,
-                        "loss": (trial.results[metric["metric_name"]]
-                                 if metric["type"] == "loss" else -trial.results[metric["metric_name"]]),
-                        "weight": trial.weight
-                    }
-                    for trial in self.trials.all()
-                ]
+                    {"sample": sample, "loss": loss, "weight": weight}
+                    for sample, loss, weight in zip(
+                        compress(observations.samples, finite),
+                        observations.losses[finite].tolist(),
+                        observations.weights[finite].tolist())
+                ],
             }
         return data
@@ -4,9 +4,10 @@ from django_extensions.db.fields import UUIDField
 from django.contrib.postgres.fields import JSONField
 from django.conf import settings
 from django.db import models
+from .mixins import TrialsRevisionMixin
 
 
-class Experiment(TimeStampedModel, models.Model):
+class Experiment(TrialsRevisionMixin, TimeStampedModel, models.Model):
     id = UUIDField(primary_key=True)
     name = models.CharField(max_length=100)
     description = models.TextField(max_length=500, null=True, blank=True)
@@ -17,10 +18,17 @@ class Experiment(TimeStampedModel, models.Model):
     shared_with = models.ManyToManyField(settings.AUTH_USER_MODEL,
                                          related_name="shared_experiments",
                                          blank=True)
+    trial_count = models.IntegerField(default=0)
+    algo_count = models.IntegerField(default=0)
 
     def __str__(self):
         return self.name
 
+    def get_metric(self, metric_name):
+        """Return the metric named metric_name, None if the experiment has no such metric."""
+        return next((metric for metric in self.metrics if metric["metric_name"] == metric_name),
+                    None)
+
     class Meta:
         unique_together = (('owner', 'name'),)
         ordering = ('-modified', )
@@ -0,0 +1,11 @@
+from django.db import models
+
+
+class TrialsRevisionMixin(object):
+    """For models with trials and a trial_count counter (algos and experiments)."""
+
+    def get_trials_revision(self):
+        """Token changing whenever a trial is created or deleted (trials are immutable)."""
+        last_created = self.trials.aggregate(last_created=models.Max("created"))["last_created"]
+        return "{}-{}".format(self.trial_count,
+                              last_created.timestamp() if last_created is not None else 0)
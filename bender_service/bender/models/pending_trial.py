@@ -0,0 +1,75 @@
+from __future__ import unicode_literals
+import datetime
+from django_extensions.db.models import TimeStampedModel
+from django.contrib.postgres.fields import JSONField
+from django_extensions.db.fields import UUIDField
+from django.conf import settings
+from django.utils import timezone
+from .algo import Algo
+from django.db import models
+
+
+class PendingTrialQuerySet(models.QuerySet):
+
+    def active(self):
+        return self.filter(expires__gt=timezone.now())
+
+    def expired(self):
+        return self.filter(expires__lte=timezone.now())
+
+    def lease(self, algo, owner, samples, duration):
+        """Record samples suggested to owner as pending for duration seconds."""
+        expires = timezone.now() + datetime.timedelta(seconds=duration)
+        return self.bulk_create([
+            PendingTrial(algo=algo, owner=owner, parameters=sample, expires=expires)
+            for sample in samples
+        ])
+
+    def close(self, algo, parameters):
+        """Close the oldest pending trial of algo whose sample is part of parameters.
+
+        Descriptive parameters are not suggested, so the sample only needs to be contained in
+        the trial parameters.
+        """
+        pending_trial = (self.filter(algo=algo, parameters__contained_by=parameters)
+                         .order_by("created").first())
+        if pending_trial is not None:
+            pending_trial.delete()
+        return pending_trial
+
+    def close_all(self, algo, parameters_list):
+        """Same as close for each parameters of parameters_list, in two queries."""
+        pending_trials = list(self.filter(algo=algo).order_by("created")
+                              .values_list("pk", "parameters"))
+        closed = []
+        for parameters in parameters_list:
+            for i, (pk, sample) in enumerate(pending_trials):
+                if all(name in parameters and parameters[name] == value
+                       for name, value in sample.items()):
+                    closed.append(pk)
+                    del pending_trials[i]
+                    break
+        if closed:
+            self.filter(pk__in=closed).delete()
+        return closed
+
+
+class PendingTrial(TimeStampedModel, models.Model):
+    """A suggested sample whose trial has not been posted yet.
+
+    Pending trials are taken into account by suggest until their lease expires or the
+    corresponding trial is created.
+    """
+    id = UUIDField(primary_key=True)
+    algo = models.ForeignKey(Algo, related_name="pending_trials")
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, related_name="pending_trials")
+    parameters = JSONField()
+    expires = models.DateTimeField(db_index=True)
+
+    objects = PendingTrialQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('-created',)
+
+    def __str__(self):
+        return 'Pending trial {} with algo {}'.format(self.pk, self.algo)
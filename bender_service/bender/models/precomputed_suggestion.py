@@ -0,0 +1,68 @@
+from __future__ import unicode_literals
+from django_extensions.db.models import TimeStampedModel
+from django.contrib.postgres.fields import JSONField
+from django_extensions.db.fields import UUIDField
+from .algo import Algo
+from django.db import models, connections
+
+
+class PrecomputedSuggestionQuerySet(models.QuerySet):
+
+    def for_key(self, algo_id, metric, optimizer, minimum_observations):
+        return self.filter(algo_id=algo_id, metric=metric, optimizer=optimizer,
+                           minimum_observations=minimum_observations)
+
+    def keys(self, algo_id):
+        """Return (metric, optimizer, minimum_observations) of the suggestions of algo."""
+        return list(self.filter(algo_id=algo_id).order_by()
+                    .values_list("metric", "optimizer", "minimum_observations").distinct())
+
+    def pop(self, algo_id, metric, optimizer, minimum_observations, number=1, low_water=0):
+        """Delete up to number suggestions, oldest first, and return their samples.
+
+        Rows locked by a concurrent pop are skipped so concurrent requests never get the
+        same suggestion nor wait for each other.
+
+        Also return how many suggestions are left, counted up to low_water only, from the same
+        statement: the count sees the rows as they were before the delete.
+        """
+        table = self.model._meta.db_table
+        key = (algo_id, metric, optimizer, minimum_observations)
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                "WITH popped AS ("
+                "DELETE FROM {table} WHERE id IN ("
+                "SELECT id FROM {table} WHERE algo_id = %s AND metric = %s AND optimizer = %s "
+                "AND minimum_observations = %s ORDER BY created LIMIT %s "
+                "FOR UPDATE SKIP LOCKED) RETURNING sample) "
+                "SELECT sample, (SELECT count(*) FROM ("
+                "SELECT 1 FROM {table} WHERE algo_id = %s AND metric = %s AND optimizer = %s "
+                "AND minimum_observations = %s LIMIT %s) AS pool) "
+                "FROM popped".format(table=table),
+                key + (number,) + key + (number + low_water,))
+            rows = cursor.fetchall()
+        if not rows:
+            return [], 0
+        return [row[0] for row in rows], rows[0][1] - len(rows)
+
+class PrecomputedSuggestion(TimeStampedModel, models.Model):
+    """A sample computed in advance for the suggestions of an algo.
+
+    Suggestions are computed for a metric, an optimizer and a minimum number of observations,
+    and are consumed by suggest requests asking for the same ones.
+    """
+    id = UUIDField(primary_key=True)
+    algo = models.ForeignKey(Algo, related_name="precomputed_suggestions")
+    metric = models.CharField(max_length=50)
+    optimizer = models.CharField(max_length=50)
+    minimum_observations = models.IntegerField()
+    sample = JSONField()
+
+    objects = PrecomputedSuggestionQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('created',)
+        index_together = (('algo', 'metric', 'optimizer', 'minimum_observations'),)
+
+    def __str__(self):
+        return 'Precomputed suggestion {} with algo {}'.format(self.pk, self.algo)
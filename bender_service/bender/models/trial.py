@@ -5,7 +5,22 @@ from django_extensions.db.fields import UUIDField
 from django.conf import settings
 from .experiment import Experiment
 from .algo import Algo
-from django.db import models
+from django.db import models, transaction
+
+
+class TrialQuerySet(models.QuerySet):
+
+    @transaction.atomic()
+    def delete(self):
+        """Keep trial counters up to date, as Trial.delete does for a single trial."""
+        deleted = list(self.order_by().values("algo_id", "experiment_id")
+                       .annotate(count=models.Count("pk")))
+        result = super(TrialQuerySet, self).delete()
+        for row in deleted:
+            Trial.update_counters(row["algo_id"], row["experiment_id"], -row["count"])
+        return result
+    delete.alters_data = True
+    delete.queryset_only = True
 
 
 class Trial(TimeStampedModel, models.Model):
@@ -18,8 +33,32 @@ class Trial(TimeStampedModel, models.Model):
     comment = JSONField(null=True, blank=True)
     weight = models.FloatField(default=1)
 
+    objects = TrialQuerySet.as_manager()
+
     class Meta:
         ordering = ('-created',)
+        index_together = (('algo', 'created'), ('experiment', 'created'))
 
     def __str__(self):
         return 'Trial {} with algo {} of experiment {}'.format(self.pk, self.algo, self.experiment)
+
+    @transaction.atomic()
+    def delete(self, *args, **kwargs):
+        """Keep trial counters up to date (TrialQuerySet.delete for several trials).
+
+        Not done in a post_delete receiver which would prevent trials from being fast deleted
+        when their algo or experiment is deleted (counters are then updated by the algo
+        pre_delete receiver).
+        """
+        algo_id, experiment_id = self.algo_id, self.experiment_id
+        result = super(Trial, self).delete(*args, **kwargs)
+        Trial.update_counters(algo_id, experiment_id, -1)
+        return result
+
+    @staticmethod
+    def update_counters(algo_id, experiment_id, delta):
+        """Add delta to trial counters of algo and experiment."""
+        Algo.objects.filter(pk=algo_id).update(
+            trial_count=models.F("trial_count") + delta)
+        Experiment.objects.filter(pk=experiment_id).update(
+            trial_count=models.F("trial_count") + delta)
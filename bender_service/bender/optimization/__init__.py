@@ -0,0 +1,19 @@
+from .cache import (OptimizationProblemCache, optimization_problem_cache,
+                    copy_optimization_problem, add_observations)
+from .suggestion import suggest, LIARS
+from .pool import ProcessPool, PoolBusy, suggestion_pool
+from .precomputed import refill_suggestions, suggestion_refiller
+
+__all__ = [
+    "OptimizationProblemCache",
+    "optimization_problem_cache",
+    "copy_optimization_problem",
+    "add_observations",
+    "suggest",
+    "LIARS",
+    "ProcessPool",
+    "PoolBusy",
+    "suggestion_pool",
+    "refill_suggestions",
+    "suggestion_refiller",
+]
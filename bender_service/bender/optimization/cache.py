@@ -0,0 +1,137 @@
+from collections import OrderedDict
+from itertools import compress
+import json
+import threading
+import numpy as np
+from django.conf import settings
+from benderopt.base import OptimizationProblem, Observation
+
+
+def add_observations(optimization_problem, observations):
+    """Add observations of Algo.get_observations to optimization_problem.
+
+    Observations without a finite loss, or whose sample does not match the optimization
+    problem parameters (e.g. descriptive parameters), are discarded.
+    """
+    finite = np.isfinite(observations.losses)
+    for sample, loss, weight in zip(compress(observations.samples, finite),
+                                    observations.losses[finite].tolist(),
+                                    observations.weights[finite].tolist()):
+        optimization_problem.add_observation(Observation(sample, loss, weight),
+                                             raise_exception=False)
+
+
+def copy_optimization_problem(optimization_problem):
+    """Copy an optimization problem without validating again its parameters and observations.
+
+    Parameters and observations are shared, only the lists holding them are copied so the copy
+    can be extended without altering the original.
+    """
+    optimization_problem_copy = OptimizationProblem(list(optimization_problem.parameters))
+    optimization_problem_copy.observations = list(optimization_problem.observations)
+    return optimization_problem_copy
+
+
+class CachedOptimizationProblem(object):
+    """An optimization problem built from the trials of an algo.
+
+    signature: serialized search space the problem was built with
+    trial_count: number of trials replayed in the problem
+    last_created: creation date of the most recent replayed trial
+    """
+
+    def __init__(self, signature, optimization_problem, trial_count, last_created):
+        self.signature = signature
+        self.optimization_problem = optimization_problem
+        self.trial_count = trial_count
+        self.last_created = last_created
+
+
+class OptimizationProblemCache(object):
+    """Per process LRU cache of optimization problems by (algo, metric).
+
+    A cached problem is extended with the trials created since it was built. It is rebuilt from
+    scratch when the algo search space changed or when trials are missing from it (deleted
+    trials or trials committed out of creation order).
+
+    Cached problems are never modified in place: extending one creates a copy, so a problem
+    returned by `get` can safely be used while other requests update the cache.
+    """
+
+    def __init__(self, max_size=None):
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_size(self):
+        if self._max_size is not None:
+            return self._max_size
+        return settings.BENDER_OPTIMIZATION_PROBLEM_CACHE_SIZE
+
+    def get(self, algo, metric):
+        """Return the optimization problem of algo for metric, None if search space is undefined."""
+        parameters = algo.get_optimization_parameters()
+        if parameters is None:
+            return None
+
+        key = (str(algo.pk), metric["metric_name"], metric["type"])
+        signature = json.dumps(parameters, sort_keys=True)
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is not None and entry.signature == signature:
+            entry = self._extend(algo, metric, entry)
+        else:
+            entry = None
+
+        if entry is None:
+            entry = self._build(algo, metric, parameters, signature)
+
+        self._store(key, entry)
+        return entry.optimization_problem
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _build(self, algo, metric, parameters, signature):
+        observations = algo.get_observations(metric, algo.trials.order_by("created"))
+        optimization_problem = OptimizationProblem.from_list(parameters)
+        add_observations(optimization_problem, observations)
+        return CachedOptimizationProblem(
+            signature=signature,
+            optimization_problem=optimization_problem,
+            trial_count=len(observations.samples),
+            last_created=observations.created[-1] if observations.created else None,
+        )
+
+    def _extend(self, algo, metric, entry):
+        """Return entry extended with new trials, None if it cannot be extended."""
+        trials = algo.trials.order_by("created")
+        if entry.last_created is not None:
+            trials = trials.filter(created__gt=entry.last_created)
+        observations = algo.get_observations(metric, trials)
+        if entry.trial_count + len(observations.samples) != algo.trials.count():
+            return None
+        if not observations.samples:
+            return entry
+
+        optimization_problem = copy_optimization_problem(entry.optimization_problem)
+        add_observations(optimization_problem, observations)
+        return CachedOptimizationProblem(
+            signature=entry.signature,
+            optimization_problem=optimization_problem,
+            trial_count=entry.trial_count + len(observations.samples),
+            last_created=observations.created[-1],
+        )
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+optimization_problem_cache = OptimizationProblemCache()
@@ -0,0 +1,102 @@
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import os
+import threading
+from django.conf import settings
+
+
+class PoolBusy(Exception):
+    """Every process of the pool is busy and its queue is full."""
+
+
+class ProcessPool(object):
+    """Bounded pool of processes running CPU bound functions out of gevent workers.
+
+    Gevent workers serve requests in greenlets of a single thread: a function fitting an
+    estimator blocks every other request of the worker while it runs. Running it in a process
+    of the pool lets the worker keep serving requests while waiting for its result.
+
+    At most size + queue_size calls are in flight per worker process, further calls raise
+    PoolBusy right away instead of piling up behind slow ones. A call whose result does not
+    come in timeout seconds raises TimeoutError: a running call cannot be cancelled, so the
+    processes of the pool are killed (other calls in flight raise BrokenProcessPool) and a new
+    pool is started by the next call.
+
+    With a size of 0 functions are called in the calling process. Processes are forked from
+    the worker, which under gevent inherit its patched hub and open sockets: the pool is not
+    enabled by default.
+    """
+
+    def __init__(self, size=None, queue_size=None, timeout=None):
+        self._size = size
+        self._queue_size = queue_size
+        self._timeout = timeout
+        self._pid = None
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        if self._size is not None:
+            return self._size
+        return settings.BENDER_SUGGEST_POOL_SIZE
+
+    @property
+    def queue_size(self):
+        if self._queue_size is not None:
+            return self._queue_size
+        return settings.BENDER_SUGGEST_POOL_QUEUE_SIZE
+
+    @property
+    def timeout(self):
+        if self._timeout is not None:
+            return self._timeout
+        return settings.BENDER_SUGGEST_TIMEOUT
+
+    def run(self, func, *args, **kwargs):
+        """Return func(*args, **kwargs) computed by a process of the pool."""
+        if self.size == 0:
+            return func(*args, **kwargs)
+
+        executor, slots = self._get_executor()
+        if not slots.acquire(blocking=False):
+            raise PoolBusy()
+        try:
+            future = executor.submit(func, *args, **kwargs)
+        except BrokenProcessPool:
+            slots.release()
+            self.shutdown()
+            raise
+        future.add_done_callback(lambda future: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except BrokenProcessPool:
+            self.shutdown()
+            raise
+        except TimeoutError:
+            if not future.cancel():
+                self.shutdown(kill=True)
+            raise
+
+    def shutdown(self, kill=False):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                if kill:
+                    # ProcessPoolExecutor has no public way to stop a running call
+                    for process in list(self._executor._processes.values()):
+                        process.terminate()
+                self._executor.shutdown(wait=False)
+            self._pid, self._executor, self._slots = None, None, None
+
+    def _get_executor(self):
+        # Created lazily per process: gunicorn preloads the application before forking workers
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._executor = ProcessPoolExecutor(max_workers=self.size)
+                self._slots = threading.BoundedSemaphore(self.size + self.queue_size)
+            return self._executor, self._slots
+
+
+suggestion_pool = ProcessPool()
@@ -0,0 +1,107 @@
+import json
+import logging
+import threading
+from django.conf import settings
+from django.db import connection, transaction
+from .cache import optimization_problem_cache
+from .pool import suggestion_pool
+from .suggestion import suggest
+
+logger = logging.getLogger(__name__)
+
+
+def refill_suggestions(algo_id, metric_name, optimizer, minimum_observations, size=None):
+    """Replace the precomputed suggestions of algo for (metric, optimizer, minimum_observations).
+
+    Suggestions are drawn with the constant liar strategy, taking pending trials into account,
+    so that consecutive suggestions are spread over the search space.
+    """
+    from bender.models import Algo, PrecomputedSuggestion
+    size = size or settings.BENDER_SUGGESTION_POOL_SIZE
+    suggestions = PrecomputedSuggestion.objects.for_key(algo_id, metric_name, optimizer,
+                                                        minimum_observations)
+    algo = Algo.objects.select_related("experiment").filter(pk=algo_id).first()
+    metric = None if algo is None else algo.experiment.get_metric(metric_name)
+    optimization_problem = None if metric is None else optimization_problem_cache.get(algo, metric)
+    if optimization_problem is None:
+        suggestions.delete()
+        return []
+
+    signature = get_signature(algo.get_optimization_parameters())
+    samples = suggestion_pool.run(
+        suggest,
+        optimization_problem=optimization_problem,
+        optimizer=optimizer,
+        minimum_observations=minimum_observations,
+        batch_size=size,
+        strategy="constant_liar",
+        pending=list(algo.pending_trials.active().values_list("parameters", flat=True)),
+    )
+    with transaction.atomic():
+        suggestions.delete()
+        algo = Algo.objects.prefetch_related("parameters").filter(pk=algo_id).first()
+        if algo is None or get_signature(algo.get_optimization_parameters()) != signature:
+            # Search space changed while suggestions were computed
+            return []
+        return PrecomputedSuggestion.objects.bulk_create([
+            PrecomputedSuggestion(algo_id=algo_id, metric=metric_name, optimizer=optimizer,
+                                  minimum_observations=minimum_observations, sample=sample)
+            for sample in samples
+        ])
+
+
+def get_signature(parameters):
+    return sorted(json.dumps(parameter, sort_keys=True) for parameter in parameters or [])
+
+
+class SuggestionRefiller(object):
+    """Refill precomputed suggestions in background threads (greenlets in gevent workers).
+
+    Refills are started once the current transaction is committed. A refill requested while
+    the same one is running is run again once it is done, never concurrently.
+    """
+
+    def __init__(self):
+        self._running = {}
+        self._lock = threading.Lock()
+
+    def schedule(self, algo_id, keys):
+        """Refill suggestions of algo for each (metric, optimizer, minimum_observations) key."""
+        if settings.BENDER_SUGGESTION_POOL_SIZE == 0:
+            return
+        for key in keys:
+            transaction.on_commit(lambda key=(str(algo_id),) + tuple(key): self._start(key))
+
+    def schedule_algo(self, algo_id):
+        """Refill every precomputed suggestions of algo, e.g. once new trials are observed."""
+        if settings.BENDER_SUGGESTION_POOL_SIZE == 0:
+            return
+        from bender.models import PrecomputedSuggestion
+        self.schedule(algo_id, PrecomputedSuggestion.objects.keys(algo_id))
+
+    def _start(self, key):
+        with self._lock:
+            if key in self._running:
+                self._running[key] = True
+                return
+            self._running[key] = False
+        threading.Thread(target=self._run, args=(key,), daemon=True).start()
+
+    def _run(self, key):
+        try:
+            while True:
+                try:
+                    refill_suggestions(*key)
+                except Exception:
+                    logger.exception("Failed to refill suggestions %s", key)
+                with self._lock:
+                    if not self._running[key]:
+                        del self._running[key]
+                        return
+                    self._running[key] = False
+        finally:
+            # Threads do not get request_finished, which closes connections of requests
+            connection.close()
+
+
+suggestion_refiller = SuggestionRefiller()
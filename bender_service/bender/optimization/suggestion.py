@@ -0,0 +1,103 @@
+import numpy as np
+from benderopt.base import Observation
+from benderopt.optimizer import optimizers as bender_optimizers
+from bender.metrics.registry import registry
+from .cache import copy_optimization_problem
+
+LIARS = {
+    "min": np.min,
+    "mean": np.mean,
+    "max": np.max,
+}
+
+
+def get_optimizer(optimization_problem, optimizer, minimum_observations=None):
+    kwargs = {"optimization_problem": optimization_problem}
+    if optimizer != "random" and minimum_observations is not None:
+        kwargs["minimum_observations"] = minimum_observations
+    return bender_optimizers.get(optimizer)(**kwargs)
+
+
+def to_python(sample):
+    """Convert numpy values drawn by benderopt to python ones."""
+    return {name: value.item() if isinstance(value, np.generic) else value
+            for name, value in sample.items()}
+
+
+def get_lie(optimization_problem, liar="max"):
+    """Return the loss given to fake observations: "min", "mean" or "max" of observed losses."""
+    losses = [observation.loss for observation in optimization_problem.observations]
+    return float(LIARS[liar](losses)) if losses else 0.
+
+
+def add_lies(optimization_problem, samples, lie):
+    """Return a copy of optimization_problem with a fake observation of loss lie per sample.
+
+    Samples which are not valid for the optimization problem (e.g. search space changed since
+    they were drawn) are discarded.
+    """
+    optimization_problem = copy_optimization_problem(optimization_problem)
+    for sample in samples:
+        optimization_problem.add_observation(Observation(sample=sample, loss=lie),
+                                             raise_exception=False)
+    return optimization_problem
+
+
+def suggest(optimization_problem, optimizer, minimum_observations=None, batch_size=None,
+            strategy="none", liar="max", pending=None):
+    """Return a sample, or a list of batch_size samples if batch_size is given.
+
+    strategy:
+      - "none": optimizer is fitted once and all samples are drawn from it.
+      - "constant_liar": after each sample, a fake observation with a loss given by liar
+        ("min", "mean" or "max" of observed losses) is added before drawing the next one,
+        which pushes the next samples away from the previous ones.
+
+    pending: samples being evaluated, added as fake observations the same way.
+
+    Lies are only told to model based optimizers once they have minimum_observations real
+    observations, before that samples are drawn at random anyway.
+    """
+    with registry.time("bender_optimizer_duration_seconds", optimizer=optimizer,
+                       strategy=strategy):
+        return draw_samples(optimization_problem, optimizer, minimum_observations, batch_size,
+                            strategy, liar, pending)
+
+
+def draw_samples(optimization_problem, optimizer, minimum_observations, batch_size, strategy,
+                 liar, pending):
+    model_based = (optimizer != "random" and
+                   optimization_problem.number_of_observations >= (minimum_observations or 0))
+    if pending and model_based:
+        optimization_problem = add_lies(optimization_problem, pending,
+                                        get_lie(optimization_problem, liar))
+
+    if batch_size is None:
+        sample = get_optimizer(optimization_problem, optimizer, minimum_observations).suggest()
+        return to_python(sample)
+
+    if strategy == "constant_liar" and model_based:
+        samples = suggest_constant_liar(optimization_problem, optimizer, batch_size,
+                                        minimum_observations, liar)
+        return [to_python(sample) for sample in samples]
+
+    optimizer = get_optimizer(optimization_problem, optimizer, minimum_observations)
+    # Parzen estimator cannot draw more than a third of its candidates at once
+    chunk_size = int(getattr(optimizer, "number_of_candidates", 3 * batch_size + 3) / 3) - 1
+    samples = []
+    while len(samples) < batch_size:
+        samples += optimizer.suggest(min(chunk_size, batch_size - len(samples)))
+    return [to_python(sample) for sample in samples]
+
+
+def suggest_constant_liar(optimization_problem, optimizer, batch_size,
+                          minimum_observations=None, liar="max"):
+    lie = get_lie(optimization_problem, liar)
+    optimization_problem = copy_optimization_problem(optimization_problem)
+    samples = []
+    for _ in range(batch_size):
+        sample = get_optimizer(optimization_problem, optimizer, minimum_observations).suggest()
+        optimization_problem.add_observation(Observation(sample=sample, loss=lie),
+                                             raise_exception=False)
+        samples.append(sample)
+    return samples
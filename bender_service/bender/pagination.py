@@ -0,0 +1,136 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(pagination.BasePagination):
+    """Paginate on (date, id) so fetching a page costs the same whatever its position.
+
+    Pages are delimited by the (date, id) of their last (or first) row instead of an offset,
+    so they stay stable while rows are inserted. Only date orderings can be paginated this
+    way: o=date, o=-date, or the default ordering of the model on created or modified
+    (experiments). Rows modified while modification date pages are walked move to the front.
+    """
+    date_fields = ("created", "modified")
+    cursor_query_param = "cursor"
+    limit_query_param = "limit"
+    default_limit = api_settings.PAGE_SIZE
+    max_limit = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.limit = self.get_limit(request)
+        self.field, self.descending = self.get_ordering(queryset)
+        position, reverse = self.decode_cursor(request)
+
+        # Going backward is going forward in the opposite direction, then reverting the page
+        descending = self.descending != reverse
+        field = self.field
+        if position is not None:
+            date, pk = position
+            lookup = "lt" if descending else "gt"
+            queryset = queryset.filter(
+                Q(**{"{}__{}".format(field, lookup): date}) |
+                Q(**{field: date, "pk__{}".format(lookup): pk}))
+        queryset = queryset.order_by(
+            *(("-" + field, "-pk") if descending else (field, "pk")))
+
+        results = list(queryset[:self.limit + 1])
+        has_more = len(results) > self.limit
+        self.page = results[:self.limit]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]))
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+            if limit <= 0:
+                raise ValueError
+        except (KeyError, ValueError):
+            return self.default_limit
+        return min(limit, self.max_limit)
+
+    def get_ordering(self, queryset):
+        """(date field, descending) of the ordering of queryset, explicit or default one."""
+        ordering = list(queryset.query.order_by or queryset.query.get_meta().ordering)
+        if len(ordering) == 1 and ordering[0].lstrip("-") in self.date_fields:
+            return ordering[0].lstrip("-"), ordering[0].startswith("-")
+        raise ValidationError("Cursor pagination is only available with date ordering.")
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, instance, reverse):
+        tokens = [getattr(instance, self.field).isoformat(), str(instance.pk),
+                  "r" if reverse else ""]
+        cursor = urlsafe_b64encode("|".join(tokens).encode("utf-8")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        """Return ((date, pk), reverse) from the cursor, (None, False) for the first page."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            date, pk, reverse = urlsafe_b64decode(encoded.encode("ascii")).decode("utf-8").split("|")
+            date = parse_datetime(date)
+            if date is None:
+                raise ValueError
+        except (TypeError, ValueError):
+            raise NotFound("Invalid cursor")
+        return (date, pk), reverse == "r"
+
+
+class CursorOrLimitOffsetPagination(pagination.BasePagination):
+    """Limit/offset pagination unless a cursor query parameter is given (empty for first page).
+
+    Limit/offset pages give a total count but get slower with the offset, keyset pages do not.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if KeysetPagination.cursor_query_param in request.query_params:
+            self.paginator = KeysetPagination()
+        else:
+            self.paginator = pagination.LimitOffsetPagination()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    @property
+    def count(self):
+        """Total count of limit/offset pages, None for keyset pages."""
+        return getattr(self.paginator, "count", None)
+
+    @property
+    def display_page_controls(self):
+        return self.paginator.display_page_controls
+
+    def to_html(self):
+        return self.paginator.to_html()
+
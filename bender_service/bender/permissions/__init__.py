@@ -2,10 +2,15 @@ from .algo import AlgoPermission
 from .experiment import ExperimentPermission
 from .trial import TrialPermission
 from .user import UserPermission
+from .superuser import SuperUserPermission
+from .resolver import RequestResolver, get_resolver
 
 __al__ = [
     "AlgoPermission",
     "ExperimentPermission",
     "TrialPermission",
     "UserPermission",
+    "SuperUserPermission",
+    "RequestResolver",
+    "get_resolver",
 ]
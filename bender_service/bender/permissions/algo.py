@@ -1,5 +1,5 @@
 from rest_framework import permissions
-from ..models import Experiment
+from .resolver import get_resolver, is_shared
 
 
 class AlgoPermission(permissions.BasePermission):
@@ -23,9 +23,10 @@ class AlgoPermission(permissions.BasePermission):
                 if not experiment_pk:  # Will be 400ed
                     return True
 
-                if Experiment.objects.filter(pk=experiment_pk).exists():
-                    experiment = Experiment.objects.get(pk=experiment_pk)
-                    if (user == experiment.owner) or (user in experiment.shared_with.all()):
+                resolver = get_resolver(request)
+                experiment = resolver.experiment(experiment_pk)
+                if experiment is not None:
+                    if resolver.can_access(experiment):
                         return True
                 else:
                     return True  # will be 400ed
@@ -36,11 +37,11 @@ class AlgoPermission(permissions.BasePermission):
                     return True
 
                 experiment_pk = request.GET.get("experiment")
-                if experiment_pk and Experiment.objects.filter(pk=experiment_pk).exists():
-                    experiment = Experiment.objects.get(pk=experiment_pk)
-                    if (request.user == experiment.owner or
-                            request.user in experiment.shared_with.all()):
-                            return True
+                if experiment_pk:
+                    resolver = get_resolver(request)
+                    experiment = resolver.experiment(experiment_pk)
+                    if experiment is not None and resolver.can_access(experiment):
+                        return True
 
             else:
                 return True
@@ -51,10 +52,10 @@ class AlgoPermission(permissions.BasePermission):
         user = request.user
 
         if user.is_authenticated():
-            if algo.owner == request.user:
+            if algo.owner_id == request.user.pk:
                 return True
-            elif view.action == "retrieve":
-                if request.user in algo.experiment.shared_with.all():
+            elif view.action in ("retrieve", "statistics", "importance"):
+                if is_shared(algo, request.user):
                     return True
 
         return False
@@ -1,4 +1,5 @@
 from rest_framework import permissions
+from .resolver import is_shared
 
 
 class ExperimentPermission(permissions.BasePermission):
@@ -36,11 +37,12 @@ class ExperimentPermission(permissions.BasePermission):
 
         if user.is_authenticated():
 
-            if experiment.owner == request.user:
+            if experiment.owner_id == request.user.pk:
                 return True
 
-            if view.action in ["algos", "trials", "latest_algo", "retrieve"]:
-                if request.user in experiment.shared_with.all():
+            if view.action in ("algos", "trials", "latest_algo", "retrieve", "leaderboard",
+                               "statistics"):
+                if is_shared(experiment, request.user):
                     return True
 
         return False
@@ -0,0 +1,82 @@
+from django.core.exceptions import ValidationError
+from django.db.models.expressions import RawSQL
+from ..models import Experiment, Algo
+
+
+def annotate_is_shared(queryset, user, experiment_column):
+    """Annotate queryset with is_shared: whether user is in shared_with of its experiment.
+
+    experiment_column is the column holding the experiment id in the queryset table.
+    """
+    field = Experiment._meta.get_field("shared_with")
+    through_table = field.remote_field.through._meta.db_table
+    return queryset.annotate(is_shared=RawSQL(
+        "EXISTS(SELECT 1 FROM {table} WHERE {table}.{experiment} = {column} "
+        "AND {table}.{user} = %s)".format(
+            table=through_table,
+            experiment=field.m2m_column_name(),
+            user=field.m2m_reverse_name(),
+            column="{}.{}".format(queryset.model._meta.db_table, experiment_column)),
+        (user.pk,)))
+
+
+def is_shared(obj, user):
+    """Whether the experiment of obj (an experiment or an algo) is shared with user.
+
+    Uses the is_shared annotation when obj has it.
+    """
+    if hasattr(obj, "is_shared"):
+        return obj.is_shared
+    experiment_id = obj.pk if isinstance(obj, Experiment) else obj.experiment_id
+    return Experiment.shared_with.through.objects.filter(
+        experiment_id=experiment_id, user_id=user.pk).exists()
+
+
+class RequestResolver(object):
+    """Experiments and algos a request refers to, each loaded once per request.
+
+    They are loaded with their owner and with is_shared, whether the request user is in
+    shared_with of the experiment, so permissions, throttles and serializers of the request
+    share a single query per object.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._objects = {}
+
+    def get_queryset(self, model):
+        if model is Experiment:
+            return annotate_is_shared(Experiment.objects.select_related("owner"),
+                                      self.user, "id")
+        if model is Algo:
+            return annotate_is_shared(Algo.objects.select_related("owner", "experiment"),
+                                      self.user, "experiment_id")
+        raise ValueError("Cannot resolve {} objects.".format(model.__name__))
+
+    def get(self, model, pk):
+        """Return the model object of primary key pk, None if it does not exist."""
+        key = (model, str(pk))
+        if key not in self._objects:
+            try:
+                self._objects[key] = self.get_queryset(model).filter(pk=pk).first()
+            except (ValueError, TypeError, ValidationError):
+                self._objects[key] = None
+        return self._objects[key]
+
+    def experiment(self, pk):
+        return self.get(Experiment, pk)
+
+    def algo(self, pk):
+        return self.get(Algo, pk)
+
+    def can_access(self, obj):
+        """Whether the request user owns obj or its experiment is shared with them."""
+        return obj.owner_id == self.user.pk or obj.is_shared
+
+
+def get_resolver(request):
+    """Return the resolver of request, created on first use."""
+    resolver = getattr(request, "_bender_resolver", None)
+    if resolver is None or resolver.user != request.user:
+        resolver = request._bender_resolver = RequestResolver(request.user)
+    return resolver
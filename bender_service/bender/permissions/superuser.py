@@ -0,0 +1,8 @@
+from rest_framework import permissions
+
+
+class SuperUserPermission(permissions.BasePermission):
+    """Only superusers, for diagnostics exposing other users data (e.g. SQL statements)."""
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_superuser)
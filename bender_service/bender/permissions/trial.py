@@ -1,5 +1,5 @@
 from rest_framework import permissions
-from ..models import Algo, Experiment
+from .resolver import get_resolver
 
 
 class TrialPermission(permissions.BasePermission):
@@ -10,38 +10,37 @@ class TrialPermission(permissions.BasePermission):
 
         if user.is_authenticated():
 
-            if view.action == "create":
+            if view.action in ("create", "bulk"):
                 algo_pk = request.data.get("algo")
 
                 if not algo_pk:  # Will be 400ed
                     return True
 
-                if Algo.objects.filter(pk=algo_pk).exists():
-                    algo = Algo.objects.get(pk=algo_pk)
-                    if (user == algo.owner):
+                algo = get_resolver(request).algo(algo_pk)
+                if algo is not None:
+                    if algo.owner_id == user.pk:
                         return True
                 else:
                     return True  # will be 400ed
 
-            elif view.action == "list":
+            elif view.action in ("list", "export"):
 
                 owner = request.GET.get("owner")
                 if owner and owner == request.user.username:
                     return True
 
+                resolver = get_resolver(request)
                 algo_pk = request.GET.get("algo")
-                if algo_pk and Algo.objects.filter(pk=algo_pk).exists():
-                    algo = Algo.objects.get(pk=algo_pk)
-                    if (request.user == algo.owner or
-                            request.user in algo.experiment.shared_with.all()):
+                if algo_pk:
+                    algo = resolver.algo(algo_pk)
+                    if algo is not None and resolver.can_access(algo):
                         return True
 
                 experiment_pk = request.GET.get("experiment")
-                if experiment_pk and Experiment.objects.filter(pk=experiment_pk).exists():
-                    experiment = Experiment.objects.get(pk=experiment_pk)
-                    if (request.user == experiment.owner or
-                            request.user in experiment.shared_with.all()):
-                            return True
+                if experiment_pk:
+                    experiment = resolver.experiment(experiment_pk)
+                    if experiment is not None and resolver.can_access(experiment):
+                        return True
             else:
                 return True
 
@@ -51,7 +50,7 @@ class TrialPermission(permissions.BasePermission):
         user = request.user
 
         if user.is_authenticated():
-            if trial.owner == request.user:
+            if trial.owner_id == request.user.pk:
                 return True
 
         return False
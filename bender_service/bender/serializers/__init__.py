@@ -1,13 +1,16 @@
 from .experiment import (ExperimentSerializer,
                          ExperimentSerializerUpdate,
                          ExperimentSerializerCreate,
-                         ExperimentSerializerBasic)
+                         ExperimentSerializerBasic,
+                         ExperimentSerializerLeaderboard)
 from .algo import (AlgoSerializer,
                    AlgoSerializerUpdate,
                    AlgoSerializerCreate,
-                   AlgoSerializerSuggest)
+                   AlgoSerializerSuggest,
+                   AlgoSerializerImportance)
 from .trial import (TrialSerializer,
-                    TrialSerializerCreate)
+                    TrialSerializerCreate,
+                    TrialSerializerBulkCreate)
 from .user import UserSerializer, UserSerializerUpdate, UserSerializerUsername
 from .register import CustomRegisterSerializer
 
@@ -16,12 +19,15 @@ __all__ = [
     "ExperimentSerializerUpdate",
     "ExperimentSerializerCreate",
     "ExperimentSerializerBasic",
+    "ExperimentSerializerLeaderboard",
     "AlgoSerializer",
     "AlgoSerializerUpdate",
     "AlgoSerializerCreate",
     "AlgoSerializerSuggest",
+    "AlgoSerializerImportance",
     "TrialSerializer",
     "TrialSerializerCreate",
+    "TrialSerializerBulkCreate",
     "UserSerializer",
     "UserSerializerUpdate",
     "UserSerializerUsername",
@@ -1,10 +1,15 @@
+from concurrent.futures import TimeoutError
+from concurrent.futures.process import BrokenProcessPool
 from django.contrib.auth import get_user_model
 from rest_framework import serializers, status
 from rest_framework.exceptions import APIException
 from django.db import transaction
-from bender.models import Algo, Trial, Parameter
-from benderopt.base import OptimizationProblem
-from benderopt.optimizer import optimizers as bender_optimizers
+from django.conf import settings
+from bender.metrics import phase
+from bender.models import Experiment, Algo, Parameter, PrecomputedSuggestion
+from bender.optimization import (optimization_problem_cache, suggest, LIARS,
+                                 suggestion_pool, suggestion_refiller, PoolBusy)
+from bender.serializers.fields import ResolvedPrimaryKeyRelatedField
 from bender.serializers.parameter import (
     ParameterSerializer,
     ParameterSerializerCreate,
@@ -20,6 +25,12 @@ class NoSearchSpaceError(APIException):
     default_code = "no_content"
 
 
+class SuggestionUnavailableError(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Suggestions are unavailable, try again later."
+    default_code = "suggestion_unavailable"
+
+
 class AlgoSerializerSuggest(serializers.Serializer):
     optimizer = serializers.ChoiceField(
         choices=("random", "parzen_estimator"), default="parzen_estimator"
@@ -28,60 +39,128 @@ class AlgoSerializerSuggest(serializers.Serializer):
     minimum_observations = serializers.IntegerField(
         min_value=1, max_value=1000, default=30
     )
+    batch_size = serializers.IntegerField(
+        min_value=1, max_value=settings.BENDER_MAX_SUGGESTION_BATCH_SIZE, required=False
+    )
+    strategy = serializers.ChoiceField(
+        choices=("none", "constant_liar"), default="none"
+    )
+    liar = serializers.ChoiceField(choices=tuple(LIARS), default="max")
+    lease = serializers.IntegerField(
+        min_value=0, max_value=settings.BENDER_MAX_PENDING_TRIAL_LEASE,
+        default=settings.BENDER_PENDING_TRIAL_LEASE
+    )
 
-    def parse_optimization_problem(self, data):
-        metric = self.parse_metric(data)
-        optimization_problem_data = self.context["algo"].get_optimization_problem(
-            metric
-        )
-        if optimization_problem_data is None:
+    def parse_optimization_problem(self, metric):
+        with phase("problem"):
+            optimization_problem = optimization_problem_cache.get(self.context["algo"], metric)
+        if optimization_problem is None:
             # FIXME: Could be standard ValidationError with a code
             # argument, available only in next versions of DRF
             raise NoSearchSpaceError()
-        optimization_problem = OptimizationProblem.from_list(
-            optimization_problem_data["parameters"]
-        )
-        optimization_problem.add_observations_from_list(
-            optimization_problem_data["observations"]
-        )
         return optimization_problem
 
     def parse_metric(self, data):
         if "metric" not in data or not data["metric"]:
             raise serializers.ValidationError({"metric": "Missing metric argument"})
-        tmp = [
-            metric
-            for metric in self.context["algo"].experiment.metrics
-            if metric["metric_name"] == data["metric"]
-        ]
-        if len(tmp) != 1:
+        metric = self.context["algo"].experiment.get_metric(data["metric"])
+        if metric is None:
             raise serializers.ValidationError({"metric": "Unknown metric asked"})
-        return tmp[0]
+        return metric
 
     def to_internal_value(self, data):
         res = super().to_internal_value(data)
-        res["optimization_problem"] = self.parse_optimization_problem(data)
+        res["metric"] = self.parse_metric(data)
+        res["pending"] = self.parse_pending()
         return res
 
+    def parse_pending(self):
+        """Purge expired pending trials of algo and return samples of the others."""
+        pending_trials = self.context["algo"].pending_trials
+        pending_trials.expired().delete()
+        return list(pending_trials.active().values_list("parameters", flat=True))
+
+    @property
+    def data(self):
+        # Skip ReturnDict wrapping of Serializer.data, a batch of samples is a list
+        return super(serializers.Serializer, self).data
+
     def to_representation(self, validated_data):
-        kwargs = {"optimization_problem": validated_data["optimization_problem"]}
-        if validated_data["optimizer"] != "random":
-            kwargs["minimum_observations"] = validated_data["minimum_observations"]
-        sample = bender_optimizers.get(validated_data["optimizer"])(**kwargs).suggest()
-        return sample
+        """Return a sample, or a list of samples when batch_size is given.
+
+        Precomputed suggestions are served first, missing samples are computed by the
+        suggestion pool so fitting the optimizer does not block the other requests of the worker.
+        """
+        batch_size = validated_data.get("batch_size")
+        number = batch_size or 1
+        samples = self.pop_precomputed(validated_data, number)
+        if len(samples) < number:
+            computed = self.compute(
+                validated_data,
+                batch_size=None if batch_size is None else number - len(samples),
+                pending=validated_data["pending"] + samples,
+            )
+            if batch_size is None:
+                return computed
+            samples += computed
+        return samples if batch_size is not None else samples[0]
+
+    def pop_precomputed(self, validated_data, number):
+        size = settings.BENDER_SUGGESTION_POOL_SIZE
+        if size == 0:
+            return []
+        key = (validated_data["metric"]["metric_name"], validated_data["optimizer"],
+               validated_data["minimum_observations"])
+        algo_id = self.context["algo"].pk
+        # Refill once the pool is half empty
+        low_water = (size + 1) // 2
+        with phase("precomputed"):
+            samples, remaining = PrecomputedSuggestion.objects.pop(
+                algo_id, *key, number=number, low_water=low_water)
+        if remaining < low_water:
+            suggestion_refiller.schedule(algo_id, [key])
+        return samples
+
+    def compute(self, validated_data, batch_size, pending):
+        optimization_problem = self.parse_optimization_problem(validated_data["metric"])
+        try:
+            with phase("optimizer"):
+                return suggestion_pool.run(
+                    suggest,
+                    optimization_problem=optimization_problem,
+                    optimizer=validated_data["optimizer"],
+                    minimum_observations=validated_data["minimum_observations"],
+                    batch_size=batch_size,
+                    strategy=validated_data["strategy"],
+                    liar=validated_data["liar"],
+                    pending=pending,
+                )
+        except PoolBusy:
+            raise SuggestionUnavailableError("Too many suggestions being computed, try again later.")
+        except TimeoutError:
+            raise SuggestionUnavailableError("Suggestion took too long to compute.")
+        except BrokenProcessPool:
+            raise SuggestionUnavailableError("Suggestion process died, try again.")
+
+
+class AlgoSerializerImportance(serializers.Serializer):
+    metric = serializers.CharField(max_length=50)
+
+    def validate_metric(self, value):
+        """Return the metric of the experiment of the algo named value."""
+        metric = self.context["algo"].experiment.get_metric(value)
+        if metric is None:
+            raise serializers.ValidationError("Unknown metric asked")
+        return metric
 
 
 class AlgoSerializer(serializers.ModelSerializer):
-    trial_count = serializers.SerializerMethodField("trial_counter")
     is_search_space_defined = serializers.SerializerMethodField()
     owner = serializers.SlugRelatedField(
         slug_field="username", queryset=User.objects.all()
     )
     parameters = ParameterSerializer(many=True)
 
-    def trial_counter(self, instance):
-        return Trial.objects.filter(algo=instance.id).count()
-
     def get_is_search_space_defined(self, instance):
         return instance.is_search_space_defined()
 
@@ -99,9 +178,11 @@ class AlgoSerializer(serializers.ModelSerializer):
             "modified",
             "is_search_space_defined",
         )
+        read_only_fields = ("trial_count",)
 
 
 class AlgoSerializerCreate(serializers.ModelSerializer):
+    experiment = ResolvedPrimaryKeyRelatedField(queryset=Experiment.objects.all())
     parameters = ParameterSerializerCreate(many=True)
     is_search_space_defined = serializers.SerializerMethodField()
 
@@ -2,6 +2,7 @@ from rest_framework import serializers
 from bender.models import Experiment
 from django.contrib.auth import get_user_model
 from django.db import transaction
+from django.conf import settings
 
 User = get_user_model()
 
@@ -12,8 +13,6 @@ class MetricSerializer(serializers.Serializer):
 
 
 class ExperimentSerializer(serializers.ModelSerializer):
-    trial_count = serializers.SerializerMethodField()
-    algo_count = serializers.SerializerMethodField()
     participants = serializers.SerializerMethodField()
     owner = serializers.SlugRelatedField(
         slug_field='username',
@@ -27,13 +26,9 @@ class ExperimentSerializer(serializers.ModelSerializer):
         slug_field='username'
     )
 
-    def get_trial_count(self, instance):
-        return instance.trials.count()
-
-    def get_algo_count(self, instance):
-        return instance.algos.count()
-
     def get_participants(self, instance):
+        if hasattr(instance, 'participant_usernames'):
+            return [[username] for username in instance.participant_usernames]
         return (instance.trials.order_by('owner__username')
                 .values_list('owner__username').distinct())
 
@@ -55,6 +50,21 @@ class ExperimentSerializer(serializers.ModelSerializer):
             'created',
             'modified',
         )
+        read_only_fields = ('trial_count', 'algo_count')
+
+
+class ExperimentSerializerLeaderboard(serializers.Serializer):
+    metric = serializers.CharField(max_length=50)
+    k = serializers.IntegerField(
+        min_value=1, max_value=settings.BENDER_MAX_LEADERBOARD_SIZE, default=1
+    )
+
+    def validate_metric(self, value):
+        """Return the metric of the experiment named value."""
+        metric = self.context["experiment"].get_metric(value)
+        if metric is None:
+            raise serializers.ValidationError("Unknown metric asked")
+        return metric
 
 
 class ExperimentSerializerBasic(serializers.ModelSerializer):
@@ -0,0 +1,15 @@
+from rest_framework import serializers
+from bender.permissions.resolver import get_resolver
+
+
+class ResolvedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field reusing the object loaded for permissions and throttles of the request."""
+
+    def to_internal_value(self, data):
+        request = self.context.get("request")
+        if request is None:
+            return super(ResolvedPrimaryKeyRelatedField, self).to_internal_value(data)
+        obj = get_resolver(request).get(self.get_queryset().model, data)
+        if obj is None:
+            self.fail("does_not_exist", pk_value=data)
+        return obj
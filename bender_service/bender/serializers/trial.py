@@ -1,6 +1,11 @@
 from rest_framework import serializers
-from bender.models import Trial
+from rest_framework.settings import api_settings
+from bender.models import Algo, Trial, PendingTrial
+from bender.optimization import suggestion_refiller
+from .fields import ResolvedPrimaryKeyRelatedField
 from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.db import transaction
 import numpy as np
 
 User = get_user_model()
@@ -34,6 +39,7 @@ class TrialSerializer(serializers.ModelSerializer):
 
 
 class TrialSerializerCreate(serializers.ModelSerializer):
+    algo = ResolvedPrimaryKeyRelatedField(queryset=Algo.objects.all())
 
     class Meta:
         model = Trial
@@ -47,31 +53,107 @@ class TrialSerializerCreate(serializers.ModelSerializer):
         )
 
     def create(self, validated_data):
-        """Add request.user as owner and algo.experiment as experiment automatically."""
+        """Add request.user as owner and algo.experiment as experiment automatically.
+
+        Close the pending trial the trial parameters were suggested by, if any.
+        """
         validated_data['owner'] = self.context['request'].user
         validated_data['experiment'] = validated_data['algo'].experiment
-        return super(TrialSerializerCreate, self).create(validated_data)
+        trial = super(TrialSerializerCreate, self).create(validated_data)
+        PendingTrial.objects.close(trial.algo, trial.parameters)
+        return trial
 
     def validate(self, data):
         """Check that results/parameters keys are same as experiment.metrics/algo.parameters"""
-        if set(data["parameters"]) != set(data["algo"].parameters.values_list("name", flat=True)):
-            raise serializers.ValidationError("Parameters are different from algo parameters.")
-        if set(data["results"].keys()) != set([x["metric_name"] for x in data["algo"].experiment.metrics]):
-            raise serializers.ValidationError(
-                "Results keys are differents from experiment metrics.")
+        validate_trial(
+            data,
+            parameter_names=set(data["algo"].parameters.values_list("name", flat=True)),
+            metric_names=set([x["metric_name"] for x in data["algo"].experiment.metrics]),
+        )
+        return data
+
 
-        if None in data["parameters"].values():
-            raise serializers.ValidationError("None is an invalid value for a parameter")
+class TrialSerializerBulkItem(serializers.ModelSerializer):
+
+    class Meta:
+        model = Trial
+        fields = (
+            'parameters',
+            'results',
+            'comment',
+            'weight',
+        )
 
-        for parameter_value in data["parameters"].values():
-            if (type(parameter_value) == float) and np.isnan(parameter_value):
-                raise serializers.ValidationError("Nan is an invalid value for a parameter")
 
-        if None in data["results"].values():
-            raise serializers.ValidationError("None is an invalid value for a parameter")
+class TrialSerializerBulkCreate(serializers.Serializer):
+    """Create many trials of the same algo at once.
 
-        for result in data["results"].values():
-            if (type(result) == float) and np.isnan(result):
-                raise serializers.ValidationError("Nan is an invalid value for a parameter")
+    Trials are validated against the algo parameters and experiment metrics in a single pass and
+    inserted in one transaction. Nothing is created if one of them is invalid, errors are then
+    reported per trial, in the same order as trials.
+    """
+    algo = ResolvedPrimaryKeyRelatedField(queryset=Algo.objects.all())
+    trials = TrialSerializerBulkItem(many=True, allow_empty=False)
 
+    def validate(self, data):
+        parameter_names = set(data["algo"].parameters.values_list("name", flat=True))
+        metric_names = set([x["metric_name"] for x in data["algo"].experiment.metrics])
+        errors = []
+        for trial_data in data["trials"]:
+            try:
+                validate_trial(trial_data, parameter_names, metric_names)
+                errors.append({})
+            except serializers.ValidationError as e:
+                errors.append({api_settings.NON_FIELD_ERRORS_KEY: e.detail})
+        if any(errors):
+            raise serializers.ValidationError({"trials": errors})
         return data
+
+    @transaction.atomic()
+    def create(self, validated_data):
+        """Add request.user as owner and algo.experiment as experiment automatically.
+
+        Close the pending trials the trials parameters were suggested by, if any.
+        """
+        algo = validated_data["algo"]
+        trials = Trial.objects.bulk_create(
+            [
+                Trial(algo=algo,
+                      experiment=algo.experiment,
+                      owner=self.context["request"].user,
+                      **trial_data)
+                for trial_data in validated_data["trials"]
+            ],
+            batch_size=settings.BENDER_TRIALS_BULK_CREATE_BATCH_SIZE,
+        )
+        # bulk_create does not send post_save
+        Trial.update_counters(algo.pk, algo.experiment_id, len(trials))
+        suggestion_refiller.schedule_algo(algo.pk)
+        PendingTrial.objects.close_all(algo, [trial.parameters for trial in trials])
+        return trials
+
+    def to_representation(self, trials):
+        return {"ids": [trial.pk for trial in trials]}
+
+
+def validate_trial(data, parameter_names, metric_names):
+    """Check trial data against algo parameter names and experiment metric names."""
+    if set(data["parameters"]) != parameter_names:
+        raise serializers.ValidationError("Parameters are different from algo parameters.")
+    if set(data["results"].keys()) != metric_names:
+        raise serializers.ValidationError(
+            "Results keys are differents from experiment metrics.")
+
+    if None in data["parameters"].values():
+        raise serializers.ValidationError("None is an invalid value for a parameter")
+
+    for parameter_value in data["parameters"].values():
+        if (type(parameter_value) == float) and np.isnan(parameter_value):
+            raise serializers.ValidationError("Nan is an invalid value for a parameter")
+
+    if None in data["results"].values():
+        raise serializers.ValidationError("None is an invalid value for a parameter")
+
+    for result in data["results"].values():
+        if (type(result) == float) and np.isnan(result):
+            raise serializers.ValidationError("Nan is an invalid value for a parameter")
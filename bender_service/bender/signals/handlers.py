@@ -1,14 +1,62 @@
 # encoding: utf-8
 from django.dispatch import receiver
 from django.db import models
+from django.db.backends.signals import connection_created
 from django.contrib.auth import get_user_model
+from bender.models import Algo, Experiment, Trial, Parameter, PrecomputedSuggestion
+from bender.db import instrument_connection
+from bender.optimization import suggestion_refiller
 from .helpers import generate_demo
 
 User = get_user_model()
 
 
+@receiver(connection_created)
+def connection_post_create(sender, connection, **kwargs):
+    """Count and time statements, for metrics and profiling."""
+    instrument_connection(connection)
+
+
 @receiver(models.signals.post_save, sender=User)
 def user_post_save(sender, instance, **kwargs):
     """Remove S3 H5File instance."""
     if kwargs["created"]:
         generate_demo(instance)
+
+
+@receiver(models.signals.post_save, sender=Trial)
+def trial_post_save(sender, instance, **kwargs):
+    """Increment trial counters (decremented in Trial.delete), fixtures carry their own.
+
+    Precomputed suggestions are refilled to take the new result into account.
+    """
+    if kwargs["created"] and not kwargs["raw"]:
+        Trial.update_counters(instance.algo_id, instance.experiment_id, 1)
+        suggestion_refiller.schedule_algo(instance.algo_id)
+
+
+@receiver(models.signals.post_save, sender=Algo)
+def algo_post_save(sender, instance, **kwargs):
+    """Increment algo counter, fixtures carry their own."""
+    if kwargs["created"] and not kwargs["raw"]:
+        Experiment.objects.filter(pk=instance.experiment_id).update(
+            algo_count=models.F("algo_count") + 1)
+
+
+@receiver(models.signals.pre_delete, sender=Algo)
+def algo_pre_delete(sender, instance, **kwargs):
+    """Decrement algo counter and trial counter by the trials deleted along the algo."""
+    Experiment.objects.filter(pk=instance.experiment_id).update(
+        algo_count=models.F("algo_count") - 1,
+        trial_count=models.F("trial_count") - instance.trials.count(),
+    )
+
+
+@receiver(models.signals.post_save, sender=Parameter)
+@receiver(models.signals.post_delete, sender=Parameter)
+def parameter_changed(sender, instance, **kwargs):
+    """Precomputed suggestions of the previous search space are not valid anymore."""
+    keys = PrecomputedSuggestion.objects.keys(instance.algo_id)
+    if keys:
+        PrecomputedSuggestion.objects.filter(algo_id=instance.algo_id).delete()
+        suggestion_refiller.schedule(instance.algo_id, keys)
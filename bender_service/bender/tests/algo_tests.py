@@ -1,11 +1,20 @@
 from rest_framework import status
 from django.contrib.auth import get_user_model
-from bender.models import Algo, Parameter
-from django.db import transaction
+from bender.models import Algo, Parameter, Trial, PendingTrial, PrecomputedSuggestion
+from bender.optimization import (OptimizationProblemCache, ProcessPool, PoolBusy,
+                                 refill_suggestions)
+from concurrent.futures import TimeoutError
+from django.db import transaction, connection
+from django.test.utils import CaptureQueriesContext
 from django.conf import settings
 from django.db.models import Count
+from django.test import SimpleTestCase, override_settings
 from .helpers import BenderTestCase
+from mock import patch
 import uuid
+import os
+import time
+import numpy as np
 
 User = get_user_model()
 
@@ -74,6 +83,26 @@ class AlgoViewsTests(BenderTestCase):
         data = response.json()
         self.assertEqual(data["results"][0]["id"], experiment.algos.order_by('-created')[0].pk)
 
+    def test_algos_list_constant_number_of_queries(self):
+        self.client.login(username=self.user1.username, password="123456")
+        experiment = self.user1.algos.all()[0].experiment
+        url = "/api/algos/?experiment={}".format(experiment.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        n = len(queries)
+
+        for i in range(5):
+            algo = Algo.objects.create(experiment=experiment, owner=self.user1,
+                                       name="algo {}".format(uuid.uuid4()))
+            Parameter.objects.create(name="alpha", algo=algo)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["count"], experiment.algos.count())
+        self.assertEqual(len(queries), n)
+
     # """ CREATE """
 
     def test_create_algos(self):
@@ -814,6 +843,174 @@ class AlgoViewsTests(BenderTestCase):
                                     data=data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_suggest_server_timing(self):
+        self.client.login(username=self.user1.username, password="123456")
+        algo = self.user1.algos.filter(experiment__name="This is my experiment 5")[0]
+        data = {"metric": "lole", "optimizer": "random"}
+        response = self.client.post("/api/algos/{}/suggest/".format(algo.pk), data=data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header("Server-Timing"))
+
+        with override_settings(BENDER_SERVER_TIMING=True):
+            response = self.client.post("/api/algos/{}/suggest/".format(algo.pk), data=data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        phases = [entry.split(";")[0] for entry in response["Server-Timing"].split(", ")]
+        for name in ("auth", "permissions", "throttles", "problem", "optimizer", "render",
+                     "db", "total"):
+            self.assertIn(name, phases)
+
+    def test_server_timing_superuser(self):
+        self.client.login(username=self.user_admin.username, password="123456")
+        response = self.client.get("/api/experiments/?owner={}".format(self.user_admin.username))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('db;dur=', response["Server-Timing"])
+
+    def test_suggest_batch(self):
+        self.client.login(username=self.user1.username, password="123456")
+
+        algo = self.user1.algos.filter(experiment__name="This is my experiment 5")[0]
+        for optimizer in ("random", "parzen_estimator"):
+            for strategy in ("none", "constant_liar"):
+                data = {
+                    "metric": algo.experiment.metrics[0]["metric_name"],
+                    "optimizer": optimizer,
+                    "batch_size": 40,
+                    "strategy": strategy,
+                }
+                response = self.client.post("/api/algos/{}/suggest/".format(algo.pk),
+                                            data=data)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                samples = response.json()
+                self.assertEqual(len(samples), 40)
+                self.assertEqual(set(samples[0]), set(["alpha", "beta", "gamma"]))
+
+    def test_suggest_process_pool(self):
+        self.client.login(username=self.user1.username, password="123456")
+
+        algo = self.user1.algos.filter(experiment__name="This is my experiment 5")[0]
+        data = {"metric": algo.experiment.metrics[0]["metric_name"], "batch_size": 2}
+        with patch("bender.serializers.algo.suggestion_pool", ProcessPool(size=1)):
+            response = self.client.post("/api/algos/{}/suggest/".format(algo.pk), data=data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_suggest_process_pool_busy(self):
+        self.client.login(username=self.user1.username, password="123456")
+
+        algo = self.user1.algos.filter(experiment__name="This is my experiment 5")[0]
+        data = {"metric": algo.experiment.metrics[0]["metric_name"]}
+        with patch("bender.serializers.algo.suggestion_pool.run", side_effect=PoolBusy):
+            response = self.client.post("/api/algos/{}/suggest/".format(algo.pk), data=data)
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(algo.pending_trials.count(), 0)
+
+    @override_settings(BENDER_SUGGESTION_POOL_SIZE=5)
+    def test_suggest_precomputed(self):
+        self.client.login(username=self.user1.username, password="123456")
+
+        algo = self.user1.algos.filter(experiment__name="This is my experiment 5")[0]
+        metric_name = algo.experiment.metrics[0]["metric_name"]
+        refill_suggestions(algo.pk, metric_name, "parzen_estimator", 30)
+        suggestions = PrecomputedSuggestion.objects.for_key(algo.pk, metric_name,
+                                                            "parzen_estimator", 30)
+        self.assertEqual(suggestions.count(), 5)
+        sample = suggestions.first().sample
+
+        with patch("bender.serializers.algo.suggestion_refiller.schedule") as schedule:
+            response = self.client.post("/api/algos/{}/suggest/".format(algo.pk),
+                                        data={"metric": metric_name})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json(), sample)
+            self.assertEqual(suggestions.count(), 4)
+            self.assertEqual(algo.pending_trials.count(), 1)
+            # Not refilled until the pool drops below its low-water mark
+            schedule.assert_not_called()
+
+            response = self.client.post("/api/algos/{}/suggest/".format(algo.pk),
+                                        data={"metric": metric_name, "batch_size": 2})
+            self.assertEqual(suggestions.count(), 2)
+            schedule.assert_called_once_with(algo.pk, [(metric_name, "parzen_estimator", 30)])
+
+        # Missing samples are computed
+        response = self.client.post("/api/algos/{}/suggest/".format(algo.pk),
+                                    data={"metric": metric_name, "batch_size": 4})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()), 4)
+        self.assertEqual(suggestions.count(), 0)
+
+    @override_settings(BENDER_SUGGESTION_POOL_SIZE=5)
+    def test_precomputed_suggestions_trial_created(self):
+        self.client.login(username=self.user1.username, password="123456")
+        algo = self.user1.algos.filter(experiment__name="This is my experiment 5")[0]
+        metric_name = algo.experiment.metrics[0]["metric_name"]
+        refill_suggestions(algo.pk, metric_name, "random", 30)
+        trial = algo.trials.all()[0]
+        trial_data = {"parameters": trial.parameters, "results": trial.results}
+        keys = [(metric_name, "random", 30)]
+
+        with patch("bender.optimization.precomputed.suggestion_refiller.schedule") as schedule:
+            response = self.client.post("/api/trials/", data=dict(trial_data, algo=algo.pk))
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            schedule.assert_called_once_with(algo.pk, keys)
+
+        with patch("bender.optimization.precomputed.suggestion_refiller.schedule") as schedule:
+            response = self.client.post("/api/trials/bulk/",
+                                        data={"algo": algo.pk, "trials": [trial_data] * 2})
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            schedule.assert_called_once_with(algo.pk, keys)
+
+    @override_settings(BENDER_SUGGESTION_POOL_SIZE=5)
+    def test_precomputed_suggestions_search_space_changed(self):
+        algo = self.user1.algos.filter(experiment__name="This is my experiment 5")[0]
+        refill_suggestions(algo.pk, algo.experiment.metrics[0]["metric_name"], "random", 30)
+        self.assertEqual(algo.precomputed_suggestions.count(), 5)
+
+        parameter = algo.parameters.get(name="alpha")
+        parameter.search_space = {"high": 0.5, "low": 0}
+        parameter.save()
+        self.assertEqual(algo.precomputed_suggestions.count(), 0)
+
+    def test_suggest_batch_too_large(self):
+        self.client.login(username=self.user1.username, password="123456")
+
+        algo = self.user1.algos.filter(experiment__name="This is my experiment 5")[0]
+        data = {
+            "metric": algo.experiment.metrics[0]["metric_name"],
+            "batch_size": settings.BENDER_MAX_SUGGESTION_BATCH_SIZE + 1,
+        }
+        response = self.client.post("/api/algos/{}/suggest/".format(algo.pk), data=data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_suggest_pending_trials(self):
+        self.client.login(username=self.user1.username, password="123456")
+
+        algo = self.user1.algos.filter(experiment__name="This is my experiment 5")[0]
+        data = {
+            "metric": algo.experiment.metrics[0]["metric_name"],
+            "batch_size": 3,
+        }
+        response = self.client.post("/api/algos/{}/suggest/".format(algo.pk), data=data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(algo.pending_trials.active().count(), 3)
+
+        data["lease"] = 0
+        response = self.client.post("/api/algos/{}/suggest/".format(algo.pk), data=data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(algo.pending_trials.count(), 3)
+
+    def test_suggest_purge_expired_pending_trials(self):
+        self.client.login(username=self.user1.username, password="123456")
+
+        algo = self.user1.algos.filter(experiment__name="This is my experiment 5")[0]
+        PendingTrial.objects.lease(algo, self.user1, [{"alpha": 1, "beta": 1, "gamma": 1}], 0)
+        data = {
+            "metric": algo.experiment.metrics[0]["metric_name"],
+        }
+        response = self.client.post("/api/algos/{}/suggest/".format(algo.pk), data=data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(algo.pending_trials.expired().count(), 0)
+        self.assertEqual(algo.pending_trials.active().count(), 1)
+
     def test_suggest_no_search_space(self):
         self.client.login(username=self.user1.username, password="123456")
 
@@ -878,6 +1075,62 @@ class AlgoViewsTests(BenderTestCase):
                                     data=data)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_statistics(self):
+        self.client.login(username=self.user2.username, password="123456")
+        algo = self.user1.algos.filter(experiment__shared_with=self.user2)[0]
+        response = self.client.get("/api/algos/{}/statistics/".format(algo.pk))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        values = np.array([trial.results["lole"] for trial in algo.trials.all()])
+        self.assertEqual(data["trial_count"], algo.trials.count())
+        self.assertEqual(data["metrics"]["lole"]["count"], len(values))
+        self.assertAlmostEqual(data["metrics"]["lole"]["mean"], values.mean())
+        self.assertAlmostEqual(data["metrics"]["lole"]["quantiles"]["50"], np.median(values))
+        self.assertEqual(sum(data["metrics"]["lole"]["histogram"]["counts"]), len(values))
+        self.assertEqual(sorted(data["parameters"]), ["alpha", "beta", "gamma"])
+
+        # Cached until trials change
+        Trial.objects.create(experiment=algo.experiment, algo=algo, owner=self.user1,
+                             parameters={"alpha": 1, "beta": 1, "gamma": 1},
+                             results={"lole": "not a number"})
+        response = self.client.get("/api/algos/{}/statistics/".format(algo.pk))
+        self.assertEqual(response.json()["metrics"]["lole"]["missing"], 1)
+
+        # And until the search space changes
+        algo.parameters.filter(name="gamma").delete()
+        response = self.client.get("/api/algos/{}/statistics/".format(algo.pk))
+        self.assertEqual(sorted(response.json()["parameters"]), ["alpha", "beta"])
+
+    def test_statistics_wrong_owner(self):
+        self.client.login(username=self.user1.username, password="123456")
+        algo = self.user2.algos.exclude(experiment__shared_with=self.user1)[0]
+        response = self.client.get("/api/algos/{}/statistics/".format(algo.pk))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_importance(self):
+        self.client.login(username=self.user2.username, password="123456")
+        algo = self.user2.algos.filter(experiment__owner=self.user2)[0]
+        Parameter.objects.filter(algo=algo, name="gamma").update(
+            category=Parameter.CATEGORICAL, search_space={"values": ["a", "b"]})
+        for _ in range(50):
+            alpha, beta = np.random.uniform(-3, 5, size=2)
+            Trial.objects.create(experiment=algo.experiment, algo=algo, owner=self.user2,
+                                 parameters={"alpha": alpha, "beta": beta,
+                                             "gamma": str(np.random.choice(["a", "b"]))},
+                                 results={"lol": 10 * alpha + 0.1 * beta, "lal": "a"})
+        response = self.client.get("/api/algos/{}/importance/?metric=lol".format(algo.pk))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data["observations"], algo.trials.count())
+        parameters = {parameter["name"]: parameter for parameter in data["parameters"]}
+        self.assertEqual(data["parameters"][0]["name"], "alpha")
+        self.assertGreater(parameters["alpha"]["correlation"], 0.8)
+        self.assertIsNone(parameters["gamma"]["correlation"])
+        self.assertIsNotNone(parameters["gamma"]["importance"])
+
+        response = self.client.get("/api/algos/{}/importance/?metric=lil".format(algo.pk))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class AlgoParametersModelTests(BenderTestCase):
 
@@ -910,3 +1163,110 @@ class AlgoParametersModelTests(BenderTestCase):
     def test_get_optimization_problem(self):
         algo = Algo.objects.all()[0]
         algo.get_optimization_problem(algo.experiment.metrics[0])
+
+    def test_get_observations(self):
+        algo = self.user2.algos.filter(experiment__owner=self.user2).first()
+        trials = {trial.pk: trial for trial in algo.trials.all()}
+        observations = algo.get_observations({"metric_name": "lol", "type": "loss"},
+                                             algo.trials.order_by("created"))
+        self.assertEqual(len(observations.samples), len(trials))
+        self.assertEqual(observations.losses.shape, (len(trials),))
+        self.assertEqual(sorted(observations.losses.tolist()),
+                         sorted(trial.results["lol"] for trial in trials.values()))
+        self.assertEqual(observations.created, sorted(observations.created))
+
+        # Rewards are negated, non numeric values are nan
+        observations = algo.get_observations({"metric_name": "lal", "type": "reward"})
+        self.assertTrue(np.isnan(observations.losses).all())
+        self.assertEqual(
+            algo.get_optimization_problem({"metric_name": "lal", "type": "reward"})["observations"],
+            [])
+
+
+class OptimizationProblemCacheTests(BenderTestCase):
+
+    def setUp(self):
+        super(OptimizationProblemCacheTests, self).setUp()
+        self.cache = OptimizationProblemCache(max_size=10)
+        self.algo = self.user1.algos.filter(experiment__name="This is my experiment 5")[0]
+        self.metric = self.algo.experiment.metrics[0]
+
+    def create_trial(self):
+        return Trial.objects.create(
+            experiment=self.algo.experiment,
+            algo=self.algo,
+            owner=self.user1,
+            parameters={"alpha": 1, "beta": 2, "gamma": 3},
+            results={self.metric["metric_name"]: 0.5},
+        )
+
+    def test_get(self):
+        optimization_problem = self.cache.get(self.algo, self.metric)
+        self.assertEqual(optimization_problem.number_of_observations, self.algo.trials.count())
+        self.assertIs(self.cache.get(self.algo, self.metric), optimization_problem)
+
+    def test_get_new_trial(self):
+        optimization_problem = self.cache.get(self.algo, self.metric)
+        n = optimization_problem.number_of_observations
+        self.create_trial()
+        self.assertEqual(self.cache.get(self.algo, self.metric).number_of_observations, n + 1)
+        self.assertEqual(optimization_problem.number_of_observations, n)
+
+    def test_get_deleted_trial(self):
+        n = self.cache.get(self.algo, self.metric).number_of_observations
+        self.algo.trials.all()[0].delete()
+        self.assertEqual(self.cache.get(self.algo, self.metric).number_of_observations, n - 1)
+
+    def test_get_search_space_changed(self):
+        self.cache.get(self.algo, self.metric)
+        parameter = self.algo.parameters.get(name="alpha")
+        parameter.search_space = {"high": 0.5, "low": 0}
+        parameter.save()
+        optimization_problem = self.cache.get(self.algo, self.metric)
+        alpha = [x for x in optimization_problem.parameters if x.name == "alpha"][0]
+        self.assertEqual(alpha.search_space["high"], 0.5)
+
+    def test_get_no_search_space(self):
+        parameter = self.algo.parameters.get(name="alpha")
+        parameter.search_space = None
+        parameter.save()
+        self.assertIsNone(self.cache.get(self.algo, self.metric))
+
+    def test_max_size(self):
+        cache = OptimizationProblemCache(max_size=1)
+        for algo in self.algo.experiment.algos.all():
+            cache.get(algo, self.metric)
+        self.assertEqual(len(cache._entries), 1)
+
+
+class ProcessPoolTests(SimpleTestCase):
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_run(self):
+        self.pool = ProcessPool(size=1, queue_size=0)
+        self.assertEqual(self.pool.run(pow, 2, 3), 8)
+        self.assertEqual(self.pool.run(pow, 2, 4), 16)
+
+    def test_run_inline(self):
+        self.pool = ProcessPool(size=0)
+        self.assertEqual(self.pool.run(os.getpid), os.getpid())
+
+    def test_run_busy(self):
+        self.pool = ProcessPool(size=1, queue_size=0)
+        executor, slots = self.pool._get_executor()
+        slots.acquire()
+        with self.assertRaises(PoolBusy):
+            self.pool.run(pow, 2, 3)
+        slots.release()
+
+    def test_run_timeout(self):
+        self.pool = ProcessPool(size=1, queue_size=0, timeout=5)
+        pid = self.pool.run(os.getpid)
+        self.pool._timeout = 0.1
+        with self.assertRaises(TimeoutError):
+            self.pool.run(time.sleep, 10)
+        # The process running the call is killed, its slot is free again
+        self.pool._timeout = 5
+        self.assertNotEqual(self.pool.run(os.getpid), pid)
@@ -4,6 +4,7 @@ from django.contrib.sites.models import Site
 from django.contrib.auth import get_user_model
 from mock import patch
 from django.core import mail
+import base64
 import re
 User = get_user_model()
 
@@ -54,6 +55,56 @@ class AuthenticationTests(APITestCase):
         response = self.client.get("/api/")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_api_token(self):
+        self.client.login(username="Toto", password="123456")
+        response = self.client.get("/api/users/token/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.json()["token"])
+        response = self.client.post("/api/users/token/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        token = response.json()["token"]
+        self.assertEqual(self.client.get("/api/users/token/").json()["token"], token)
+        self.client.logout()
+
+        self.client.credentials(HTTP_AUTHORIZATION="Token {}".format(token))
+        response = self.client.get("/api/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.post("/api/users/token/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        new_token = response.json()["token"]
+        self.assertNotEqual(new_token, token)
+
+        response = self.client.get("/api/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.client.credentials(HTTP_AUTHORIZATION="Token {}".format(new_token))
+        response = self.client.get("/api/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Cached tokens of deactivated users are rejected at once
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get("/api/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_api_basic(self):
+        credentials = "Basic {}".format(base64.b64encode(b"Toto:123456").decode("ascii"))
+        for _ in range(2):
+            self.client.credentials(HTTP_AUTHORIZATION=credentials)
+            response = self.client.get("/api/")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.user.set_password("654321")
+        self.user.save()
+        response = self.client.get("/api/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        with self.settings(BENDER_BASIC_AUTHENTICATION=False):
+            credentials = "Basic {}".format(base64.b64encode(b"Toto:654321").decode("ascii"))
+            self.client.credentials(HTTP_AUTHORIZATION=credentials)
+            response = self.client.get("/api/")
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
     def test_login_with_email(self):
         data = {
             "email": "toto@gmail.com",
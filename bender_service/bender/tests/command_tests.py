@@ -0,0 +1,52 @@
+from bender.models import Trial
+from django.core.management import call_command
+from django.utils.six import StringIO
+from .helpers import BenderTestCase
+
+
+class CommandTests(BenderTestCase):
+
+    def test_benchmark_suggest(self):
+        trial_count = Trial.objects.count()
+        out = StringIO()
+        call_command("benchmark_suggest", "--sizes", "10", "20", "--repeat", "2",
+                     "--optimizer", "random", stdout=out)
+        for name in ("legacy observations", "suggest (cold cache)", "suggest (warm cache)"):
+            self.assertEqual(out.getvalue().count(name), 2)
+        # Rolled back
+        self.assertEqual(Trial.objects.count(), trial_count)
+
+    def test_benchmark_db_concurrency(self):
+        out = StringIO()
+        call_command("benchmark_db_concurrency", "--concurrency", "4", "--queries", "2",
+                     "--sleep", "0.01", stdout=out)
+        self.assertEqual([line.split()[0] for line in out.getvalue().splitlines()],
+                         ["blocking", "green"])
+
+    def test_benchmark_api(self):
+        trial_count = Trial.objects.count()
+        out = StringIO()
+        call_command("benchmark_api", "--sizes", "10", "20", "--repeat", "2",
+                     "--optimizer", "random", stdout=out)
+        for endpoint in ("suggest", "trial_create", "trial_list", "experiment_list",
+                         "algo_list"):
+            self.assertIn(endpoint, out.getvalue())
+        # Rolled back
+        self.assertEqual(Trial.objects.count(), trial_count)
+
+    def test_generate_synthetic_data(self):
+        call_command("generate_synthetic_data", "--experiments", "2", "--algos", "3",
+                     "--trials", "7", "--batch-size", "5", "--owner", self.user1.username,
+                     stdout=StringIO())
+        experiments = self.user1.experiments.filter(name__startswith="synthetic")
+        self.assertEqual(experiments.count(), 2)
+        for experiment in experiments:
+            self.assertEqual(experiment.algo_count, experiment.algos.count())
+            self.assertEqual(experiment.trial_count, experiment.trials.count())
+            self.assertEqual(experiment.trial_count, 21)
+            for algo in experiment.algos.all():
+                self.assertEqual(algo.trial_count, algo.trials.count())
+                self.assertEqual(len(algo.get_observations(experiment.metrics[0]).samples), 7)
+        parameter_names = set(algo.parameters.values_list("name", flat=True))
+        for trial in algo.trials.all():
+            self.assertEqual(set(trial.parameters), parameter_names)
@@ -1,6 +1,10 @@
 from rest_framework import status
 from bender.models import Experiment, Trial, Algo
-from django.db import transaction
+from bender.db import get_metric_names, get_metric_index_name
+from django.core.management import call_command
+from django.utils.six import StringIO
+from django.db import transaction, connection
+from django.test.utils import CaptureQueriesContext
 from django.conf import settings
 from .helpers import BenderTestCase
 from django.contrib.auth import get_user_model
@@ -24,6 +28,67 @@ class ExperimentViewsTests(BenderTestCase):
         response = self.client.get("/api/experiments/")
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_list_experiment_constant_number_of_queries(self):
+        self.client.login(username=self.user1.username, password="123456")
+        url = "/api/experiments/?owner={}".format(self.user1.username)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        n = len(queries)
+
+        for i in range(5):
+            experiment = Experiment.objects.create(
+                name="experiment {}".format(i),
+                metrics=[{"metric_name": "lol", "type": "loss"}],
+                owner=self.user1,
+            )
+            experiment.shared_with.add(self.user2)
+            algo = Algo.objects.create(experiment=experiment, owner=self.user1, name="algo")
+            Trial.objects.create(experiment=experiment, algo=algo, owner=self.user1,
+                                 parameters={}, results={"lol": 1})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), n)
+
+        data = response.json()["results"]
+        experiment = self.user1.experiments.get(pk=data[0]["id"])
+        self.assertEqual(data[0]["trial_count"], experiment.trials.count())
+        self.assertEqual(data[0]["algo_count"], experiment.algos.count())
+        self.assertEqual(data[0]["participants"], [[self.user1.username]])
+        self.assertEqual(data[0]["shared_with"], [self.user2.username])
+
+    def test_list_experiment_with_owner_cursor(self):
+        self.client.login(username=self.user1.username, password="123456")
+
+        response = self.client.get(
+            "/api/experiments/?owner={}&o=-date&limit=1&cursor=".format(self.user1.username))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        data = response.json()
+        self.assertEqual(data["results"][0]["id"],
+                         self.user1.experiments.order_by("-created")[0].pk)
+        self.assertEqual(data["previous"], None)
+        response = self.client.get(data["next"])
+        self.assertEqual(response.json()["results"][0]["id"],
+                         self.user1.experiments.order_by("-created")[1].pk)
+
+    def test_list_experiment_with_owner_cursor_default_ordering(self):
+        """Experiments are ordered by modification date by default."""
+        self.client.login(username=self.user1.username, password="123456")
+        experiments = self.user1.experiments.order_by("-modified", "-pk")
+
+        response = self.client.get(
+            "/api/experiments/?owner={}&limit=1&cursor=".format(self.user1.username))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data["results"][0]["id"], experiments[0].pk)
+        data = self.client.get(data["next"]).json()
+        self.assertEqual(data["results"][0]["id"], experiments[1].pk)
+        data = self.client.get(data["previous"]).json()
+        self.assertEqual(data["results"][0]["id"], experiments[0].pk)
+
     def test_list_experiment_with_owner(self):
         self.client.login(username=self.user1.username, password="123456")
 
@@ -35,6 +100,21 @@ class ExperimentViewsTests(BenderTestCase):
         self.assertEqual(data["count"],
                          self.user1.experiments.count())
 
+    def test_list_experiment_not_modified(self):
+        self.client.login(username=self.user1.username, password="123456")
+        url = "/api/experiments/?owner={}".format(self.user1.username)
+
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Trial counters are part of the representation
+        trial = self.user1.trials.all()[0]
+        Trial.objects.create(experiment=trial.experiment, algo=trial.algo, owner=self.user1,
+                             parameters=trial.parameters, results=trial.results)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_list_experiment_with_wrong_owner(self):
         self.client.login(username=self.user1.username, password="123456")
 
@@ -310,9 +390,78 @@ class ExperimentViewsTests(BenderTestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_leaderboard(self):
+        self.client.login(username="Toto2", password="123456")
+        experiment = Experiment.objects.get(name="This is my experiment 5")
+        Trial.objects.create(experiment=experiment, algo=experiment.algos.first(),
+                             owner=self.user1, parameters={"alpha": 1, "beta": 1, "gamma": 1},
+                             results={"lole": "not a number"})
+
+        response = self.client.get("/api/experiments/{}/leaderboard/?metric=lole&k=2".format(
+            experiment.pk))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(len(data["algos"]), experiment.algos.count())
+        best = sorted(trial.results["lole"] for trial in experiment.trials.all()
+                      if not isinstance(trial.results["lole"], str))
+        self.assertEqual([trial["value"] for trial in data["overall"]], best[:2])
+        for algo in data["algos"]:
+            self.assertEqual(len(algo["trials"]), 2)
+            values = [trial["value"] for trial in algo["trials"]]
+            self.assertEqual(values, sorted(values))
+
+        # Cached until trials change
+        trial = Trial.objects.create(experiment=experiment, algo=experiment.algos.first(),
+                                     owner=self.user1, results={"lole": -1},
+                                     parameters={"alpha": 1, "beta": 1, "gamma": 1})
+        response = self.client.get("/api/experiments/{}/leaderboard/?metric=lole".format(
+            experiment.pk))
+        self.assertEqual(response.json()["overall"][0]["id"], trial.pk)
+
+    def test_leaderboard_unknown_metric(self):
+        self.client.login(username="Toto1", password="123456")
+        experiment = Experiment.objects.get(name="This is my experiment 5")
+        response = self.client.get("/api/experiments/{}/leaderboard/?metric=lol".format(
+            experiment.pk))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_statistics(self):
+        self.client.login(username="Toto2", password="123456")
+        experiment = self.user2.experiments.all()[0]
+        response = self.client.get("/api/experiments/{}/statistics/".format(experiment.pk))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data["trial_count"], experiment.trials.count())
+        self.assertEqual(data["metrics"]["lol"]["count"], experiment.trials.count())
+        self.assertEqual(data["metrics"]["lol"]["type"], "loss")
+        # Not a number
+        self.assertEqual(data["metrics"]["lal"]["count"], 0)
+        self.assertEqual(data["metrics"]["lal"]["missing"], experiment.trials.count())
+
 
 class ExperimentModelTests(BenderTestCase):
 
     def test_repr(self):
         experiment = Experiment.objects.all()[0]
         self.assertEqual(str(experiment), experiment.name)
+
+    def test_get_metric_names(self):
+        self.assertEqual(get_metric_names([{"metric_name": "lol", "type": "gain"}]), ["lol"])
+        self.assertEqual(get_metric_names([{"metric_name": "lol", "type": "loss"},
+                                           {"metric_name": "lal", "type": "reward"}]),
+                         ["lal", "lol"])
+
+    def test_create_metric_indexes(self):
+        # Foreign keys of the test data are checked at commit, which CREATE INDEX cannot wait for
+        with connection.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        call_command("create_metric_indexes", "--blocking", stdout=StringIO())
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s",
+                           (Trial._meta.db_table,))
+            indexes = {row[0] for row in cursor.fetchall()}
+        for metric_name in ("lol", "lal"):
+            for descending in (False, True):
+                self.assertIn(get_metric_index_name("algo_id", metric_name, descending), indexes)
+                self.assertIn(get_metric_index_name("experiment_id", metric_name, descending),
+                              indexes)
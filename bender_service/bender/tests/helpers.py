@@ -21,7 +21,7 @@ class BenderTestCase(APITestCase):
         for _ in range(2):
             experiment = Experiment.objects.create(
                 name="This is my experiment {}".format(uuid.uuid4()),
-                metrics={"metric_name": "lol", "type": "gain"},
+                metrics=[{"metric_name": "lol", "type": "gain"}],
                 owner=self.user1,
             )
             for _ in range(3):
@@ -0,0 +1,144 @@
+from rest_framework import status
+from django.test import SimpleTestCase, override_settings
+from bender.metrics import MetricsRegistry, render
+from bender.metrics.registry import merge
+from bender.metrics.profiling import QueryRecorder, get_query_shape
+from bender.models import Trial
+from .helpers import BenderTestCase
+from mock import patch
+import json
+import os
+import tempfile
+
+
+class MetricsViewsTests(BenderTestCase):
+
+    def test_metrics(self):
+        self.client.login(username=self.user1.username, password="123456")
+        algo = self.user1.algos.all()[0]
+        response = self.client.get("/api/trials/?algo={}".format(algo.pk))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.login(username=self.user_admin.username, password="123456")
+        response = self.client.get("/api/metrics/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        content = response.content.decode("utf-8")
+        labels = '{action="list",view="TrialViewSet"}'
+        self.assertIn("# TYPE bender_request_duration_seconds histogram", content)
+        self.assertIn('bender_request_duration_seconds_count'
+                      '{action="list",status="200",view="TrialViewSet"}', content)
+        self.assertIn("bender_request_queries_total" + labels, content)
+        self.assertIn("bender_request_rows_total" + labels, content)
+
+    def test_metrics_not_staff(self):
+        self.client.login(username=self.user1.username, password="123456")
+        response = self.client.get("/api/metrics/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ProfilingTests(BenderTestCase):
+
+    def test_profile(self):
+        self.client.login(username=self.user_admin.username, password="123456")
+        response = self.client.get("/api/experiments/?owner={}".format(self.user_admin.username),
+                                   HTTP_X_BENDER_PROFILE="1")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        profile_id = response["X-Bender-Profile-Id"]
+
+        response = self.client.get("/api/profiles/{}/".format(profile_id))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertIn(data["profiler"], ("sampling", "cprofile"))
+        self.assertEqual(data["status"], status.HTTP_200_OK)
+        self.assertGreater(data["queries"]["count"], 0)
+        self.assertEqual(len(data["queries"]["statements"]), data["queries"]["count"])
+
+    def test_profile_metrics_dir(self):
+        self.client.login(username=self.user_admin.username, password="123456")
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(BENDER_METRICS_DIR=directory):
+            response = self.client.get(
+                "/api/experiments/?owner={}".format(self.user_admin.username),
+                HTTP_X_BENDER_PROFILE="1")
+            profile_id = response["X-Bender-Profile-Id"]
+            # Readable by the other workers
+            self.assertTrue(os.path.exists(
+                os.path.join(directory, "profiles", "{}.json".format(profile_id))))
+
+            response = self.client.get("/api/profiles/{}/".format(profile_id))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json()["id"], profile_id)
+
+    def test_profile_not_superuser(self):
+        self.client.login(username=self.user1.username, password="123456")
+        with patch("bender.views.mixins.profile_request") as profile_request:
+            response = self.client.get("/api/experiments/?owner={}&profile=1".format(
+                self.user1.username))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertFalse(response.has_header("X-Bender-Profile-Id"))
+
+            self.client.logout()
+            response = self.client.get("/api/experiments/?profile=1",
+                                       HTTP_X_BENDER_PROFILE="1")
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        profile_request.assert_not_called()
+        self.client.login(username=self.user1.username, password="123456")
+
+        response = self.client.get("/api/profiles/{}/".format("0" * 32))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_repeated_queries(self):
+        trials = list(Trial.objects.all()[:6])
+        recorder = QueryRecorder()
+        recorder.start()
+        try:
+            for trial in trials:
+                Trial.objects.get(pk=trial.pk).algo.name
+        finally:
+            recorder.stop()
+        report = recorder.get_report()
+        self.assertEqual(report["count"], 12)
+        self.assertEqual(len(report["repeated"]), 2)
+        self.assertEqual(report["repeated"][0]["count"], 6)
+        self.assertTrue(any("metrics_tests.py" in frame for frame in report["repeated"][0]["stack"]))
+
+    def test_get_query_shape(self):
+        self.assertEqual(
+            get_query_shape("SELECT * FROM t1 WHERE id IN (%s, %s, 3) AND name = 'a''b'\n LIMIT 21"),
+            "SELECT * FROM t1 WHERE id IN (...) AND name = ? LIMIT ?")
+
+
+class MetricsRegistryTests(SimpleTestCase):
+
+    def test_render(self):
+        registry = MetricsRegistry()
+        registry.inc("bender_request_queries_total", 3, view="AlgoViewSet", action="suggest")
+        registry.observe("bender_optimizer_duration_seconds", 0.2, optimizer="random",
+                         strategy="none")
+        content = render(*merge([registry.dump()]))
+        self.assertIn('bender_request_queries_total{action="suggest",view="AlgoViewSet"} 3.0',
+                      content)
+        labels = 'optimizer="random",strategy="none"'
+        self.assertIn('bender_optimizer_duration_seconds_bucket{%s,le="0.1"} 0.0' % labels,
+                      content)
+        self.assertIn('bender_optimizer_duration_seconds_bucket{%s,le="0.25"} 1.0' % labels,
+                      content)
+        self.assertIn('bender_optimizer_duration_seconds_bucket{%s,le="+Inf"} 1.0' % labels,
+                      content)
+        self.assertIn('bender_optimizer_duration_seconds_sum{%s} 0.2' % labels, content)
+
+    def test_collect_processes(self):
+        # Metrics of another worker
+        other = MetricsRegistry()
+        other.inc("bender_request_queries_total", 5, view="AlgoViewSet", action="list")
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(BENDER_METRICS_DIR=directory):
+            with open(os.path.join(directory, "bender_metrics_0.json"), "w") as f:
+                json.dump(other.dump(), f)
+            registry = MetricsRegistry()
+            registry.inc("bender_request_queries_total", 2, view="AlgoViewSet", action="list")
+
+            counters, _ = registry.collect()
+            key = ("bender_request_queries_total", (("action", "list"), ("view", "AlgoViewSet")))
+            self.assertEqual(counters[key], 7)
@@ -1,10 +1,17 @@
 from rest_framework import status
-from bender.models import Trial
-from django.db import transaction
+from bender.models import Experiment, Algo, Trial, PendingTrial
+from django.core.management import call_command
+from django.db import transaction, connection
+from django.test import modify_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
 from django.conf import settings
 from .helpers import BenderTestCase
 from django.contrib.auth import get_user_model
 import numpy as np
+import json
+import csv
+import uuid
 User = get_user_model()
 
 
@@ -68,6 +75,48 @@ class TrialViewsTests(BenderTestCase):
         data = response.json()
         self.assertEqual(data["count"], algo.trials.count())
 
+    def test_trials_list_not_modified(self):
+        self.client.login(username=self.user1.username, password="123456")
+        algo = self.user1.algos.all()[0]
+        response = self.client.get("/api/trials/?algo={}".format(algo.pk))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+
+        response = self.client.get("/api/trials/?algo={}".format(algo.pk), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+        algo.trials.all()[0].delete()
+        response = self.client.get("/api/trials/?algo={}".format(algo.pk), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_trials_list_cursor_not_modified(self):
+        self.client.login(username=self.user1.username, password="123456")
+        algo = self.user1.algos.all()[0]
+        url = "/api/trials/?algo={}&cursor=&limit=2".format(algo.pk)
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Newest trials come first
+        trial = algo.trials.all()[0]
+        Trial.objects.create(experiment=trial.experiment, algo=algo, owner=self.user1,
+                             parameters=trial.parameters, results=trial.results)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_trials_retrieve_not_modified_since(self):
+        self.client.login(username=self.user1.username, password="123456")
+        trial = self.user1.trials.all()[0]
+        response = self.client.get("/api/trials/{}/".format(trial.pk))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get("/api/trials/{}/".format(trial.pk),
+                                   HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
     def test_trials_list_algo_wrong_owner(self):
         self.client.login(username=self.user1.username, password="123456")
         algo = self.user2.algos.exclude(experiment__shared_with=self.user1)[0]
@@ -125,6 +174,124 @@ class TrialViewsTests(BenderTestCase):
         results = [trial_data["parameters"][key] for trial_data in data["results"]]
         self.assertEqual(results, sorted(results)[::-1])
 
+    def test_trials_list_algo_order_results_numeric(self):
+        self.client.login(username=self.user1.username, password="123456")
+        algo = self.user1.algos.all()[0]
+        algo.trials.all().delete()
+        for value in (10, 9, 100, "a"):
+            Trial.objects.create(experiment=algo.experiment, algo=algo, owner=self.user1,
+                                 parameters={"alpha": 1, "beta": 1, "gamma": 1},
+                                 results={"lol": value})
+        response = self.client.get("/api/trials/?algo={}&o_results=lol".format(algo.pk))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = [trial_data["results"]["lol"] for trial_data in response.json()["results"]]
+        self.assertEqual(results, [9, 10, 100, "a"])
+
+        response = self.client.get("/api/trials/?algo={}&o_results=-lol".format(algo.pk))
+        results = [trial_data["results"]["lol"] for trial_data in response.json()["results"]]
+        self.assertEqual(results, [100, 10, 9, "a"])
+
+    def test_trials_list_algo_range_results(self):
+        self.client.login(username=self.user1.username, password="123456")
+        algo = self.user1.algos.all()[0]
+        algo.trials.all().delete()
+        for value in (10, 9, 100, "a"):
+            Trial.objects.create(experiment=algo.experiment, algo=algo, owner=self.user1,
+                                 parameters={"alpha": value, "beta": 1, "gamma": 1},
+                                 results={"lol": value})
+        response = self.client.get(
+            "/api/trials/?algo={}&results__lol__gte=9.5&parameters__alpha__lt=100".format(algo.pk))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = [trial_data["results"]["lol"] for trial_data in response.json()["results"]]
+        self.assertEqual(results, [10])
+
+        response = self.client.get("/api/trials/?algo={}&results__lol__gt=a".format(algo.pk))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_trials_list_cursor(self):
+        self.client.login(username=self.user1.username, password="123456")
+        experiment = self.user1.experiments.all()[0]
+        url = "/api/trials/?experiment={}&limit=3&cursor=".format(experiment.pk)
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            data = response.json()
+            self.assertEqual("count" in data, False)
+            pages.append([trial_data["id"] for trial_data in data["results"]])
+            url = data["next"]
+        ids = [pk for page in pages for pk in page]
+        self.assertEqual(ids, list(experiment.trials.order_by("-created", "-pk")
+                                   .values_list("pk", flat=True)))
+
+        response = self.client.get(self.client.get(
+            "/api/trials/?experiment={}&limit=3&cursor=".format(experiment.pk)).json()["next"])
+        response = self.client.get(response.json()["previous"])
+        self.assertEqual([trial_data["id"] for trial_data in response.json()["results"]], pages[0])
+
+    def test_trials_list_cursor_ascending(self):
+        self.client.login(username=self.user1.username, password="123456")
+        algo = self.user1.algos.all()[0]
+        response = self.client.get("/api/trials/?algo={}&o=date&limit=2&cursor=".format(algo.pk))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([trial_data["id"] for trial_data in response.json()["results"]],
+                         list(algo.trials.order_by("created", "pk").values_list("pk", flat=True)[:2]))
+
+    def test_trials_list_cursor_bad_ordering(self):
+        self.client.login(username=self.user1.username, password="123456")
+        algo = self.user1.algos.all()[0]
+        response = self.client.get("/api/trials/?algo={}&o_results=lole&cursor=".format(algo.pk))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_trials_list_cursor_invalid(self):
+        self.client.login(username=self.user1.username, password="123456")
+        algo = self.user1.algos.all()[0]
+        response = self.client.get("/api/trials/?algo={}&cursor=lol".format(algo.pk))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_trials_export_experiment(self):
+        self.client.login(username=self.user2.username, password="123456")
+        experiment = self.user1.experiments.filter(shared_with=self.user2)[0]
+        response = self.client.get("/api/trials/export/?experiment={}".format(experiment.pk))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), experiment.trials.count())
+        row = json.loads(lines[0])
+        self.assertEqual(set(["parameters.alpha", "parameters.beta", "parameters.gamma",
+                              "results.lole", "algo_name", "owner"]).issubset(row), True)
+
+    def test_trials_export_algo_csv(self):
+        self.client.login(username=self.user1.username, password="123456")
+        algo = self.user1.algos.first()
+        response = self.client.get("/api/trials/export/?algo={}&output=csv".format(algo.pk))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = list(csv.reader(b"".join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(len(rows), algo.trials.count() + 1)
+        self.assertEqual(rows[0][-5:], ["parameters.alpha", "parameters.beta", "parameters.gamma",
+                                        "results.lole", "comment"])
+
+    @modify_settings(MIDDLEWARE={"prepend": "bender_service.access_logs.AccessLogsMiddleware"})
+    def test_trials_export_access_logs(self):
+        self.client.login(username=self.user1.username, password="123456")
+        algo = self.user1.algos.first()
+        response = self.client.get("/api/trials/export/?algo={}".format(algo.pk))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), algo.trials.count())
+
+    def test_trials_export_wrong_owner(self):
+        self.client.login(username=self.user1.username, password="123456")
+        experiment = self.user2.experiments.exclude(shared_with=self.user1)[0]
+        response = self.client.get("/api/trials/export/?experiment={}".format(experiment.pk))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_trials_export_bad_output(self):
+        self.client.login(username=self.user1.username, password="123456")
+        algo = self.user1.algos.first()
+        response = self.client.get("/api/trials/export/?algo={}&output=xml".format(algo.pk))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     # """ CREATE """
 
     def test_create_trials(self):
@@ -144,6 +311,39 @@ class TrialViewsTests(BenderTestCase):
         self.assertEqual(Trial.objects.get(pk=response.json()['id']).experiment, algo.experiment)
         self.assertEqual(self.user1.trials.count(), n + 1)
 
+    def test_create_trials_algo_loaded_once(self):
+        self.client.login(username=self.user1.username, password="123456")
+        algo = self.user1.algos.first()
+        data = {
+            'algo': algo.pk,
+            'parameters': {'alpha': 1, 'beta': 20, 'gamma': 'kik'},
+            'results': {metric["metric_name"]: 15 for metric in algo.experiment.metrics},
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post("/api/trials/", data=data)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        algo_selects = [query for query in context.captured_queries
+                        if query["sql"].startswith("SELECT") and
+                        'FROM "{}"'.format(Algo._meta.db_table) in query["sql"]]
+        self.assertEqual(len(algo_selects), 1)
+
+    def test_create_trials_close_pending_trial(self):
+        self.client.login(username=self.user1.username, password="123456")
+        algo = self.user1.algos.first()
+        PendingTrial.objects.lease(algo, self.user1, [{'alpha': 10, 'beta': 20}], 60)
+        PendingTrial.objects.lease(algo, self.user1, [{'alpha': 10, 'beta': 21}], 60)
+        data = {
+            'algo': algo.pk,
+            'parameters': {'alpha': 10, 'beta': 20, 'gamma': 'kik'},
+            'results': {metric["metric_name"]: 15 for metric in algo.experiment.metrics},
+        }
+        response = self.client.post("/api/trials/", data=data)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(list(algo.pending_trials.values_list("parameters", flat=True)),
+                         [{'alpha': 10, 'beta': 21}])
+
     def test_create_trials_throttling(self):
         self.client.login(username=self.user1.username, password="123456")
         algo = self.user1.algos.first()
@@ -293,6 +493,86 @@ class TrialViewsTests(BenderTestCase):
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_bulk_create_trials(self):
+        self.client.login(username=self.user1.username, password="123456")
+        n = self.user1.trials.count()
+        algo = self.user1.algos.first()
+        PendingTrial.objects.lease(algo, self.user1, [{'alpha': 1, 'beta': 20}], 60)
+        data = {
+            'algo': algo.pk,
+            'trials': [
+                {
+                    'parameters': {'alpha': i, 'beta': 20, 'gamma': 'kik'},
+                    'results': {metric["metric_name"]: 15 for metric in algo.experiment.metrics},
+                    'comment': {"text": "cool results"}
+                }
+                for i in range(10)
+            ],
+        }
+        response = self.client.post("/api/trials/bulk/", data=data)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.json()["ids"]), 10)
+        self.assertEqual(self.user1.trials.count(), n + 10)
+        self.assertEqual(algo.trials.filter(pk__in=response.json()["ids"]).count(), 10)
+        self.assertEqual(algo.pending_trials.count(), 0)
+        algo.refresh_from_db()
+        self.assertEqual(algo.trial_count, algo.trials.count())
+
+    def test_bulk_create_trials_invalid(self):
+        self.client.login(username=self.user1.username, password="123456")
+        n = self.user1.trials.count()
+        algo = self.user1.algos.first()
+        results = {metric["metric_name"]: 15 for metric in algo.experiment.metrics}
+        data = {
+            'algo': algo.pk,
+            'trials': [
+                {'parameters': {'alpha': 1, 'beta': 20, 'gamma': 'kik'}, 'results': results},
+                {'parameters': {'alpha': 1, 'beta': 20}, 'results': results},
+                {'parameters': {'alpha': 1, 'beta': 20, 'gamma': None}, 'results': results},
+            ],
+        }
+        response = self.client.post("/api/trials/bulk/", data=data)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.json()["trials"]
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(errors[0], {})
+        self.assertNotEqual(errors[1], {})
+        self.assertNotEqual(errors[2], {})
+        self.assertEqual(self.user1.trials.count(), n)
+
+    def test_bulk_create_trials_try_to_force_owner(self):
+        self.client.login(username=self.user1.username, password="123456")
+        algo = self.user2.algos.first()
+        data = {
+            'algo': algo.pk,
+            'trials': [{
+                'parameters': {'alpha': 1, 'beta': 20, 'gamma': 'kik'},
+                'results': {metric["metric_name"]: 15 for metric in algo.experiment.metrics},
+            }],
+        }
+        response = self.client.post("/api/trials/bulk/", data=data)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_bulk_create_trials_throttling(self):
+        self.client.login(username=self.user1.username, password="123456")
+        algo = self.user1.algos.first()
+        data = {
+            'algo': algo.pk,
+            'trials': [
+                {
+                    'parameters': {'alpha': 1, 'beta': 20, 'gamma': 'kik'},
+                    'results': {metric["metric_name"]: 15 for metric in algo.experiment.metrics},
+                }
+                for _ in range(settings.BENDER_MAX_TRIALS_PER_ALGO - algo.trials.count() + 1)
+            ],
+        }
+        response = self.client.post("/api/trials/bulk/", data=data)
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
     # # """ DELETE """
 
     def test_delete_trials(self):
@@ -338,3 +618,57 @@ class TrialModelTests(BenderTestCase):
 
     def test_repr(self):
         str(self.user1.trials.all()[0])
+
+    def test_counters(self):
+        trial = self.user1.trials.all()[0]
+        algo, experiment = trial.algo, trial.experiment
+        self.assertEqual(algo.trial_count, algo.trials.count())
+        self.assertEqual(experiment.trial_count, experiment.trials.count())
+
+        Trial.objects.create(experiment=experiment, algo=algo, owner=self.user1,
+                             parameters=trial.parameters, results=trial.results)
+        trial.delete()
+        algo.refresh_from_db()
+        experiment.refresh_from_db()
+        self.assertEqual(algo.trial_count, algo.trials.count())
+        self.assertEqual(experiment.trial_count, experiment.trials.count())
+
+        algo.delete()
+        experiment.refresh_from_db()
+        self.assertEqual(experiment.trial_count, experiment.trials.count())
+        self.assertEqual(experiment.algo_count, experiment.algos.count())
+
+    def test_counters_raw(self):
+        trial = self.user1.trials.first()
+        algo = trial.algo
+        # As loaddata saves objects, id and dates included
+        Trial(id=uuid.uuid4(), experiment=algo.experiment, algo=algo, owner=self.user1,
+              parameters=trial.parameters, results=trial.results,
+              created=trial.created, modified=trial.modified).save_base(raw=True)
+        algo.refresh_from_db()
+        self.assertEqual(algo.trial_count, algo.trials.count() - 1)
+
+    def test_counters_queryset_delete(self):
+        algo = self.user1.algos.first()
+        experiment = algo.experiment
+        trial_count = experiment.trial_count
+        deleted = algo.trials.count()
+        Trial.objects.filter(algo=algo).delete()
+        algo.refresh_from_db()
+        experiment.refresh_from_db()
+        self.assertEqual(algo.trial_count, 0)
+        self.assertEqual(experiment.trial_count, trial_count - deleted)
+        self.assertEqual(experiment.trial_count, experiment.trials.count())
+
+    def test_rebuild_counters(self):
+        algo = self.user1.algos.first()
+        Algo.objects.filter(pk=algo.pk).update(trial_count=0)
+        Experiment.objects.filter(pk=algo.experiment_id).update(trial_count=0, algo_count=0)
+
+        call_command("rebuild_counters", stdout=StringIO())
+        algo.refresh_from_db()
+        experiment = algo.experiment
+        experiment.refresh_from_db()
+        self.assertEqual(algo.trial_count, algo.trials.count())
+        self.assertEqual(experiment.trial_count, experiment.trials.count())
+        self.assertEqual(experiment.algo_count, experiment.algos.count())
@@ -1,6 +1,6 @@
 from rest_framework import throttling, exceptions
 from django.conf import settings
-from ..models import Experiment
+from ..permissions.resolver import get_resolver
 
 
 class AlgoThrottle(throttling.BaseThrottle):
@@ -12,9 +12,9 @@ class AlgoThrottle(throttling.BaseThrottle):
         if view.action == "create":
             experiment_pk = request.data.get('experiment')
             if experiment_pk:
-                if Experiment.objects.filter(pk=experiment_pk).exists():
-                    experiment = Experiment.objects.get(pk=experiment_pk)
-                    if (experiment.algos.count() >= settings.BENDER_MAX_ALGO_PER_EXPERIMENT):
+                experiment = get_resolver(request).experiment(experiment_pk)
+                if experiment is not None:
+                    if (experiment.algo_count >= settings.BENDER_MAX_ALGO_PER_EXPERIMENT):
                         raise exceptions.Throttled(
                             detail="Max number of algo reached for this experiment.")
         return True
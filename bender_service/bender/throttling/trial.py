@@ -1,6 +1,6 @@
 from rest_framework import throttling, exceptions
 from django.conf import settings
-from ..models import Algo
+from ..permissions.resolver import get_resolver
 
 
 class TrialThrottle(throttling.BaseThrottle):
@@ -9,12 +9,16 @@ class TrialThrottle(throttling.BaseThrottle):
         if request.user.pk in settings.WHITELIST:
             return True
 
-        if view.action == "create":
+        if view.action in ("create", "bulk"):
             algo_pk = request.data.get('algo')
             if algo_pk:
-                if Algo.objects.filter(pk=algo_pk).exists():
-                    algo = Algo.objects.get(pk=algo_pk)
-                    if (algo.trials.count() >= settings.BENDER_MAX_TRIALS_PER_ALGO):
+                algo = get_resolver(request).algo(algo_pk)
+                if algo is not None:
+                    new_trials = 1
+                    if view.action == "bulk":
+                        trials = request.data.get('trials')
+                        new_trials = len(trials) if type(trials) == list else 0
+                    if (algo.trial_count + new_trials > settings.BENDER_MAX_TRIALS_PER_ALGO):
                         raise exceptions.Throttled(
                             detail="Max number of trials reached for this algo.")
         return True
@@ -4,6 +4,7 @@ from .views import experiment as experiment_views
 from .views import algo as algo_views
 from .views import trial as trial_views
 from .views import user as user_views
+from .views import metrics as metrics_views
 
 router = DefaultRouter()
 
@@ -13,5 +14,7 @@ router.register(r'trials', trial_views.TrialViewSet, base_name="trials")
 router.register(r'users', user_views.UserViewSet, base_name="users")
 
 urlpatterns = [
+    url(r'^metrics/$', metrics_views.MetricsView.as_view(), name="metrics"),
+    url(r'^profiles/(?P<pk>[0-9a-f]{32})/$', metrics_views.ProfileView.as_view(), name="profile"),
     url(r'^', include(router.urls)),
 ]
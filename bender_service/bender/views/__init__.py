@@ -1,9 +1,12 @@
 from .experiment import ExperimentViewSet
 from .algo import AlgoViewSet
 from .trial import TrialViewSet
+from .metrics import MetricsView, ProfileView
 
 __all__ = [
     'ExperimentViewSet',
     'AlgoViewSet',
     'TrialViewSet',
+    'MetricsView',
+    'ProfileView',
 ]
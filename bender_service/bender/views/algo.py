@@ -1,23 +1,42 @@
-from rest_framework import viewsets, pagination, status
+from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import detail_route
-from ..models import Algo
-from ..serializers import AlgoSerializer, AlgoSerializerUpdate, AlgoSerializerCreate, AlgoSerializerSuggest
+from ..models import Algo, PendingTrial
+from ..serializers import (AlgoSerializer, AlgoSerializerUpdate, AlgoSerializerCreate,
+                           AlgoSerializerSuggest, AlgoSerializerImportance)
+from ..serializers.algo import NoSearchSpaceError
 from ..permissions import AlgoPermission
+from ..permissions.resolver import annotate_is_shared
 from ..throttling import AlgoThrottle
+from ..pagination import CursorOrLimitOffsetPagination
+from ..analysis import get_statistics, get_importance
+from .mixins import ConditionalGetMixin, ProfilingMixin, ServerTimingMixin
 from ..filters import AlgoFilter
 from benderopt.optimizer import optimizers as bender_optimizers
 from benderopt.base import OptimizationProblem
 
 
-class AlgoViewSet(viewsets.ModelViewSet):
+class AlgoViewSet(ProfilingMixin, ServerTimingMixin, ConditionalGetMixin,
+                  viewsets.ModelViewSet):
 
     queryset = Algo.objects.all()
     serializer_class = AlgoSerializer
     permission_classes = (AlgoPermission,)
     throttle_classes = (AlgoThrottle,)
     filter_class = AlgoFilter
-    pagination_class = pagination.LimitOffsetPagination
+    pagination_class = CursorOrLimitOffsetPagination
+    etag_counters = ("trial_count",)
+
+    def get_queryset(self):
+        queryset = super(AlgoViewSet, self).get_queryset()
+        if self.action in ("list", "retrieve"):
+            # Everything AlgoSerializer needs, in a constant number of queries
+            queryset = queryset.select_related("owner").prefetch_related("parameters")
+        if self.action in ("retrieve", "statistics", "importance"):
+            queryset = annotate_is_shared(queryset, self.request.user, "experiment_id")
+        if self.action in ("suggest", "statistics", "importance"):
+            queryset = queryset.select_related("experiment")
+        return queryset
 
     def get_serializer_class(self):
         serializer_class = self.serializer_class
@@ -35,4 +54,29 @@ class AlgoViewSet(viewsets.ModelViewSet):
         algo = self.get_object()
         serializer = AlgoSerializerSuggest(data=request.data, context={"algo": algo})
         serializer.is_valid(raise_exception=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        samples = serializer.data
+        lease = serializer.validated_data["lease"]
+        if lease > 0:
+            PendingTrial.objects.lease(
+                algo=algo,
+                owner=request.user,
+                samples=samples if isinstance(samples, list) else [samples],
+                duration=lease,
+            )
+        return Response(samples, status=status.HTTP_200_OK)
+
+    @detail_route(methods=["get"])
+    def statistics(self, request, pk=None):
+        """Statistics of each metric and numeric parameter over the trials of the algo."""
+        return Response(get_statistics(self.get_object()), status=status.HTTP_200_OK)
+
+    @detail_route(methods=["get"])
+    def importance(self, request, pk=None):
+        """Importance of each parameter of the search space for a metric (query parameter)."""
+        algo = self.get_object()
+        serializer = AlgoSerializerImportance(data=request.query_params, context={"algo": algo})
+        serializer.is_valid(raise_exception=True)
+        importance = get_importance(algo, serializer.validated_data["metric"])
+        if importance is None:
+            raise NoSearchSpaceError()
+        return Response(importance, status=status.HTTP_200_OK)
@@ -1,23 +1,52 @@
-from rest_framework import viewsets, pagination
+from rest_framework import viewsets, status
+from rest_framework.decorators import detail_route
+from rest_framework.response import Response
 from django.contrib.auth import get_user_model
-from ..models import Experiment
+from django.db.models.expressions import RawSQL
+from ..models import Experiment, Trial
 from ..serializers import (ExperimentSerializer,
                            ExperimentSerializerUpdate,
-                           ExperimentSerializerCreate)
+                           ExperimentSerializerCreate,
+                           ExperimentSerializerLeaderboard)
 from ..permissions import ExperimentPermission
+from ..permissions.resolver import annotate_is_shared
 from ..throttling import ExperimentThrottle
+from ..pagination import CursorOrLimitOffsetPagination
+from ..analysis import get_leaderboard, get_statistics
+from .mixins import ConditionalGetMixin, ProfilingMixin, ServerTimingMixin
 from ..filters import ExperimentFilter
 
 User = get_user_model()
 
 
-class ExperimentViewSet(viewsets.ModelViewSet):
+class ExperimentViewSet(ProfilingMixin, ServerTimingMixin, ConditionalGetMixin,
+                        viewsets.ModelViewSet):
     queryset = Experiment.objects.all()
     serializer_class = ExperimentSerializer
     permission_classes = (ExperimentPermission,)
     throttle_classes = (ExperimentThrottle,)
     filter_class = ExperimentFilter
-    pagination_class = pagination.LimitOffsetPagination
+    pagination_class = CursorOrLimitOffsetPagination
+    etag_counters = ("trial_count", "algo_count")
+
+    def get_queryset(self):
+        queryset = super(ExperimentViewSet, self).get_queryset()
+        if self.action in ("list", "retrieve"):
+            # Everything ExperimentSerializer needs, in a constant number of queries
+            experiment_id = "{}.id".format(Experiment._meta.db_table)
+            queryset = (queryset.select_related("owner")
+                        .prefetch_related("shared_with")
+                        .annotate(
+                            participant_usernames=RawSQL(
+                                "ARRAY(SELECT DISTINCT u.username FROM {} t "
+                                "INNER JOIN {} u ON u.id = t.owner_id "
+                                "WHERE t.experiment_id = {} ORDER BY u.username)".format(
+                                    Trial._meta.db_table, User._meta.db_table, experiment_id), ()),
+                        ))
+        if self.action in ("algos", "trials", "latest_algo", "retrieve", "leaderboard",
+                           "statistics"):
+            queryset = annotate_is_shared(queryset, self.request.user, "id")
+        return queryset
 
     def get_serializer_class(self):
         serializer_class = self.serializer_class
@@ -29,3 +58,21 @@ class ExperimentViewSet(viewsets.ModelViewSet):
             serializer_class = ExperimentSerializerUpdate
 
         return serializer_class
+
+    @detail_route(methods=["get"])
+    def leaderboard(self, request, pk=None):
+        """Best trials of each algo, and overall, for a metric of the experiment.
+
+        Query parameters: metric (required) and k, number of trials per algo (default 1).
+        """
+        experiment = self.get_object()
+        serializer = ExperimentSerializerLeaderboard(data=request.query_params,
+                                                     context={"experiment": experiment})
+        serializer.is_valid(raise_exception=True)
+        return Response(get_leaderboard(experiment, **serializer.validated_data),
+                        status=status.HTTP_200_OK)
+
+    @detail_route(methods=["get"])
+    def statistics(self, request, pk=None):
+        """Statistics of each metric and numeric parameter over the trials of the experiment."""
+        return Response(get_statistics(self.get_object()), status=status.HTTP_200_OK)
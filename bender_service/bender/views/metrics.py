@@ -0,0 +1,28 @@
+from django.http import HttpResponse, Http404
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from ..metrics import render, CONTENT_TYPE, get_profile
+from ..metrics.registry import registry
+from ..permissions import SuperUserPermission
+
+
+class MetricsView(APIView):
+    """Metrics of every worker process, in Prometheus text format."""
+    permission_classes = (permissions.IsAdminUser,)
+    throttle_classes = ()
+
+    def get(self, request):
+        return HttpResponse(render(*registry.collect()), content_type=CONTENT_TYPE)
+
+
+class ProfileView(APIView):
+    """Report of a request profiled by ProfilingMixin."""
+    permission_classes = (SuperUserPermission,)
+    throttle_classes = ()
+
+    def get(self, request, pk):
+        report = get_profile(pk)
+        if report is None:
+            raise Http404
+        return Response(report, status=status.HTTP_200_OK)
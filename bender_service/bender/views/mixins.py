@@ -0,0 +1,150 @@
+import hashlib
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+from bender.metrics import phase, get_timings, profile_request, save_profile
+
+
+def etag_matches(etag, if_none_match):
+    """Whether etag is one of the etags of an If-None-Match header (weak comparison)."""
+    etags = [value.strip() for value in if_none_match.split(",")]
+    return "*" in etags or any(value.replace("W/", "", 1) == etag.replace("W/", "", 1)
+                               for value in etags)
+
+
+class ConditionalGetMixin(object):
+    """Answer 304 Not Modified to list and retrieve requests when nothing changed.
+
+    The ETag of an object is computed from its modification date and its etag_counters fields:
+    counters are updated with F() expressions which do not bump modified. The ETag of a list
+    is computed from the objects of the page returned, plus the total count of limit/offset
+    pages, so it costs no query besides the ones of the list itself.
+
+    When last_modified is set (objects never change once created), retrieve also sends
+    Last-Modified and honors If-Modified-Since.
+    """
+    etag_counters = ()
+    last_modified = False
+
+    def get_etag(self, request, revision):
+        value = "|".join(str(part) for part in (
+            request.user.pk,
+            request.get_full_path(),
+            request.accepted_renderer.format,
+        ) + tuple(revision))
+        return 'W/"{}"'.format(hashlib.md5(value.encode("utf-8")).hexdigest())
+
+    def get_list_revision(self, objects):
+        revision = [getattr(self.paginator, "count", None)]
+        for obj in objects:
+            revision += self.get_object_revision(obj)
+        return revision
+
+    def get_object_revision(self, obj):
+        return [obj.pk, obj.modified] + [getattr(obj, counter) for counter in self.etag_counters]
+
+    def not_modified(self, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        return self.set_conditional_headers(response, etag)
+
+    def set_conditional_headers(self, response, etag, last_modified=None):
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified.timestamp())
+        # Responses depend on the user, clients must revalidate them
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        objects = list(queryset) if page is None else page
+        etag = self.get_etag(request, self.get_list_revision(objects))
+        if etag_matches(etag, request.META.get("HTTP_IF_NONE_MATCH", "")):
+            return self.not_modified(etag)
+        serializer = self.get_serializer(objects, many=True)
+        if page is None:
+            response = Response(serializer.data)
+        else:
+            response = self.get_paginated_response(serializer.data)
+        return self.set_conditional_headers(response, etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = self.get_etag(request, self.get_object_revision(instance))
+        last_modified = instance.modified if self.last_modified else None
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+        if if_none_match is not None:
+            if etag_matches(etag, if_none_match):
+                return self.not_modified(etag)
+        elif last_modified is not None:
+            if_modified_since = parse_http_date_safe(
+                request.META.get("HTTP_IF_MODIFIED_SINCE", ""))
+            if if_modified_since is not None and int(last_modified.timestamp()) <= if_modified_since:
+                return self.not_modified(etag)
+        serializer = self.get_serializer(instance)
+        return self.set_conditional_headers(Response(serializer.data), etag, last_modified)
+
+
+class ServerTimingMixin(object):
+    """Time authentication, permission and throttle checks and rendering of the response.
+
+    Phases are reported in the Server-Timing header by ServerTimingMiddleware. Responses of
+    timed requests are rendered here rather than by the request handler to time rendering.
+    """
+
+    def perform_authentication(self, request):
+        with phase("auth"):
+            super().perform_authentication(request)
+
+    def check_permissions(self, request):
+        with phase("permissions"):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with phase("permissions"):
+            super().check_object_permissions(request, obj)
+
+    def check_throttles(self, request):
+        with phase("throttles"):
+            super().check_throttles(request)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if get_timings() is not None and isinstance(response, Response):
+            with phase("render"):
+                response.render()
+        return response
+
+
+class ProfilingMixin(object):
+    """Profile requests of superusers sending an X-Bender-Profile header or a profile parameter.
+
+    Profiling starts once the request is authenticated, allowed and not throttled, so requests
+    of other users are never profiled. The request is handled under a sampling profiler and
+    its statements are recorded with the stack they were run from, statements of a same shape
+    run many times being flagged. The report is saved (see save_profile), its id is sent in
+    the X-Bender-Profile-Id header and it can be read on /api/profiles/<id>/.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        wants_profile = (request.META.get("HTTP_X_BENDER_PROFILE") or
+                         request.query_params.get("profile"))
+        if wants_profile and request.user.is_superuser:
+            self.profiler = profile_request(request)
+
+    def dispatch(self, request, *args, **kwargs):
+        self.profiler = None
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+        finally:
+            # Also release the sampler when the view raises
+            if self.profiler is not None:
+                self.profiler.stop()
+        if self.profiler is not None:
+            report = self.profiler.get_report(response)
+            save_profile(report)
+            response["X-Bender-Profile-Id"] = report["id"]
+        return response
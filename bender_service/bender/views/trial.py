@@ -1,12 +1,22 @@
-from rest_framework import viewsets, pagination, mixins
-from ..models import Trial
-from ..serializers import TrialSerializer, TrialSerializerCreate
+from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import list_route
+from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
+from django.http import StreamingHttpResponse, Http404
+from ..models import Trial, Parameter
+from ..exporters import TrialExporter
+from ..serializers import TrialSerializer, TrialSerializerCreate, TrialSerializerBulkCreate
 from ..permissions import TrialPermission
+from ..permissions.resolver import get_resolver
 from ..throttling import TrialThrottle
+from ..pagination import CursorOrLimitOffsetPagination
+from .mixins import ConditionalGetMixin, ProfilingMixin, ServerTimingMixin
 from ..filters import TrialFilter
 
 
-class TrialViewSet(mixins.CreateModelMixin,
+class TrialViewSet(ProfilingMixin, ServerTimingMixin,
+                   ConditionalGetMixin,
+                   mixins.CreateModelMixin,
                    mixins.ListModelMixin,
                    mixins.RetrieveModelMixin,
                    mixins.DestroyModelMixin,
@@ -16,7 +26,8 @@ class TrialViewSet(mixins.CreateModelMixin,
     permission_classes = (TrialPermission,)
     throttle_classes = (TrialThrottle,)
     filter_class = TrialFilter
-    pagination_class = pagination.LimitOffsetPagination
+    pagination_class = CursorOrLimitOffsetPagination
+    last_modified = True  # trials cannot be updated
 
     def get_serializer_class(self):
         serializer_class = self.serializer_class
@@ -24,4 +35,51 @@ class TrialViewSet(mixins.CreateModelMixin,
         if self.action in ('create', ):
             serializer_class = TrialSerializerCreate
 
+        if self.action in ('bulk', ):
+            serializer_class = TrialSerializerBulkCreate
+
         return serializer_class
+
+    @list_route(methods=["post"])
+    def bulk(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @list_route(methods=["get"])
+    def export(self, request):
+        """Stream trials of an experiment or an algo as NDJSON (default) or CSV.
+
+        Use output=csv query parameter for CSV. Filters and orderings of list apply.
+        """
+        output = request.GET.get("output", "ndjson")
+        if output not in TrialExporter.FORMATS:
+            raise ValidationError({"output": "Output must be one of {}.".format(
+                ", ".join(sorted(TrialExporter.FORMATS)))})
+
+        resolver = get_resolver(request)
+        if request.GET.get("algo"):
+            algo = resolver.algo(request.GET["algo"])
+            if algo is None:
+                raise Http404
+            experiment = algo.experiment
+            parameters = Parameter.objects.filter(algo=algo)
+        elif request.GET.get("experiment"):
+            experiment = resolver.experiment(request.GET["experiment"])
+            if experiment is None:
+                raise Http404
+            parameters = Parameter.objects.filter(algo__experiment=experiment)
+        else:
+            raise ValidationError("Need an experiment or an algo to export.")
+
+        exporter = TrialExporter(
+            queryset=self.filter_queryset(self.get_queryset()),
+            parameter_names=parameters.order_by("name").values_list("name", flat=True).distinct(),
+            metric_names=[metric["metric_name"] for metric in experiment.metrics],
+        )
+        response = StreamingHttpResponse(exporter.export(output),
+                                         content_type=TrialExporter.FORMATS[output])
+        response["Content-Disposition"] = 'attachment; filename="trials_{}.{}"'.format(
+            experiment.pk, output)
+        return response
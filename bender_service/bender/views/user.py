@@ -5,12 +5,16 @@ from ..serializers import (UserSerializer,
                            UserSerializerUpdate,
                            UserSerializerUsername)
 from ..permissions import UserPermission
+from ..authentication import rotate_token
+from .mixins import ProfilingMixin, ServerTimingMixin
+from rest_framework.authtoken.models import Token
 from django.core.mail import send_mail
 from django.template import loader
 from django.conf import settings
 
 
-class UserViewSet(mixins.DestroyModelMixin,
+class UserViewSet(ProfilingMixin, ServerTimingMixin,
+                  mixins.DestroyModelMixin,
                   mixins.UpdateModelMixin,
                   mixins.ListModelMixin,
                   mixins.RetrieveModelMixin,
@@ -36,6 +40,19 @@ class UserViewSet(mixins.DestroyModelMixin,
 
         return serializer_class
 
+    @list_route(methods=["get", "post"])
+    def token(self, request):
+        """Return the API token of the user (GET, null until created), or create or replace
+        it by a new one (POST).
+
+        Use it in an "Authorization: Token <token>" header.
+        """
+        if request.method == "POST":
+            key = rotate_token(request.user).key
+        else:
+            key = Token.objects.filter(user=request.user).values_list("key", flat=True).first()
+        return response.Response({"token": key}, status=status.HTTP_200_OK)
+
     @list_route(methods=["post"])
     def contact(self, request):
         html_message = loader.render_to_string('bender/contact_success.html')
@@ -0,0 +1,18 @@
+from django.http import HttpResponse
+import django_access_logger
+
+
+class AccessLogsMiddleware(django_access_logger.AccessLogsMiddleware):
+    """Access logs of django_access_logger, which also handles streaming responses.
+
+    The content of a streaming response (trial exports) is produced after middlewares return,
+    so these responses are logged without it.
+    """
+
+    def process_response(self, request, response):
+        if not response.streaming:
+            return super().process_response(request, response)
+        logged = HttpResponse(status=response.status_code)
+        logged._headers = response._headers
+        super().process_response(request, logged)
+        return response
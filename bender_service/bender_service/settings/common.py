@@ -56,6 +56,8 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'bender.metrics.MetricsMiddleware',
+    'bender.metrics.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -134,7 +136,8 @@ REST_FRAMEWORK = {
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.BasicAuthentication',
+        'bender.authentication.CachedBasicAuthentication',
+        'bender.authentication.CachedTokenAuthentication',
         'rest_framework_jwt.authentication.JSONWebTokenAuthentication',
     ),
     'TEST_REQUEST_DEFAULT_FORMAT': 'json',
@@ -215,7 +218,29 @@ DEFAULT_FROM_EMAIL = 'Bender'
 BENDER_MAX_EXPERIMENT_PER_USER = 30
 BENDER_MAX_ALGO_PER_EXPERIMENT = 30
 BENDER_MAX_TRIALS_PER_ALGO = 1000
+BENDER_TRIALS_BULK_CREATE_BATCH_SIZE = 1000
 BENDER_MAX_SHARED_WITH_PER_EXPERIMENT = 10
 BENDER_LOAD_DEMO = True
+BENDER_OPTIMIZATION_PROBLEM_CACHE_SIZE = 256
+BENDER_MAX_SUGGESTION_BATCH_SIZE = 200
+BENDER_PENDING_TRIAL_LEASE = 3600  # seconds, 0 to not record suggestions as pending trials
+BENDER_MAX_PENDING_TRIAL_LEASE = 7 * 24 * 3600
+BENDER_SUGGEST_POOL_SIZE = 0  # processes computing suggestions per worker, 0 to compute inline
+BENDER_SUGGEST_POOL_QUEUE_SIZE = 8  # suggestions waiting for a process before answering 503
+BENDER_SUGGEST_TIMEOUT = 20  # seconds, below gunicorn timeout
+BENDER_SUGGESTION_POOL_SIZE = 0  # suggestions computed in advance per algo, metric and optimizer
+BENDER_BASIC_AUTHENTICATION = True  # False to only accept session, token and JWT
+BENDER_AUTHENTICATION_CACHE_TTL = 300  # seconds authenticated tokens and credentials are cached
+BENDER_MAX_LEADERBOARD_SIZE = 100
+BENDER_ANALYSIS_CACHE_TIMEOUT = 24 * 3600  # seconds, cached analyses are keyed by trials revision
+BENDER_STATISTICS_BINS = 20  # histogram bins of trial statistics
+BENDER_IMPORTANCE_BINS = 10  # quantile bins of numeric parameters in importance analysis
+BENDER_METRICS = True  # record request metrics, scraped on /api/metrics/
+BENDER_METRICS_DIR = None  # directory where processes share metrics and profiles, needed with several workers
+BENDER_METRICS_FLUSH_INTERVAL = 5  # seconds between writes of the metrics of a process
+BENDER_SERVER_TIMING = False  # Server-Timing header on API responses, always sent to superusers
+BENDER_PROFILE_INTERVAL = 0.005  # seconds of CPU time between samples of profiled requests
+BENDER_PROFILE_TIMEOUT = 3600  # seconds profiles of requests are kept
+BENDER_PROFILE_REPEATED_QUERIES = 5  # statements of a same shape flagged as N+1
 
 WHITELIST = os.environ.get("WHITELIST", [155, 172, 188])  # to replace by envvar
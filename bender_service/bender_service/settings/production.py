@@ -32,7 +32,14 @@ ACCESS_LOGS_CONFIG = {
     ],
 }
 
-MIDDLEWARE.insert(0, 'django_access_logger.AccessLogsMiddleware')
+MIDDLEWARE.insert(0, 'bender_service.access_logs.AccessLogsMiddleware')
+
+# Processes fitting optimizers out of the gevent workers, not enabled until proven under gevent
+BENDER_SUGGEST_POOL_SIZE = int(os.environ.get("BENDER_SUGGEST_POOL_SIZE", 0))
+BENDER_SUGGESTION_POOL_SIZE = int(os.environ.get("BENDER_SUGGESTION_POOL_SIZE", 10))
+
+# Gunicorn workers share their metrics through files, cleared by gunicorn on start
+BENDER_METRICS_DIR = os.environ.get("BENDER_METRICS_DIR", "/tmp/bender_metrics")
 
 LOGGING = {
     'version': 1,
@@ -17,6 +17,10 @@ graceful_timeout = 35
 workers = 3
 worker_class = 'gevent'
 
+# Each greenlet serving a request uses its own database connection, keep
+# workers * worker_connections below postgres max_connections
+worker_connections = 30
+
 # Maximum number of pending connection
 backlog = 2048
 
@@ -30,3 +34,17 @@ max_requests_jitter = 512
 # Preload the application code before worker processes are forked (decreases
 # RAM consumption a bit)
 preload = True
+
+
+def post_fork(server, worker):
+    """Make psycopg2 yield to the gevent hub while waiting for postgres."""
+    if "gevent" in server.cfg.worker_class_str:
+        from bender.db import make_psycopg_green
+        make_psycopg_green()
+
+
+def on_starting(server):
+    """Forget metrics of the workers of a previous run (see BENDER_METRICS_DIR)."""
+    import os
+    from bender.metrics import clear_metrics_dir
+    clear_metrics_dir(os.environ.get("BENDER_METRICS_DIR", "/tmp/bender_metrics"))